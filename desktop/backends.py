@@ -0,0 +1,239 @@
+import threading
+import time
+import openai
+from config import (
+    MODEL, CHUNK_MAX_TOKENS, BACKEND_MODE, LOCAL_MAX_WORDS, LOCAL_MIN_RATIO, LATENCY_BUDGET_MS,
+    INCREMENTAL_SECTIONS,
+    CODE_OUTLINE_ENABLED,
+)
+from client import get_client
+from chunking import estimate_tokens, split_into_chunks, split_into_sections, map_reduce
+from cache import summary_cache, make_key
+from outline import code_outliner
+from prompts import build_prompt
+from ratelimit import backend_limiter
+from extractive import extractive_summary
+from metrics import metrics
+
+class SummaryBackend:
+    """
+    Interface shared by every summarization engine.
+
+    Subclasses set name, model and the actions they support, and implement run().
+    """
+    name = None
+    model = None
+    actions = ()
+
+    def supports(self, action):
+        return action in self.actions
+
+    def run(self, action, text, max_length=150, min_length=100, style="default", language=None):
+        """Return the complete result for an action."""
+        raise NotImplementedError
+
+    def stream(self, action, text, max_length=150, min_length=100, style="default", language=None):
+        """Yield the result in pieces; engines without streaming yield it whole."""
+        yield self.run(action, text, max_length, min_length, style, language)
+
+class RemoteBackend(SummaryBackend):
+    """OpenAI chat-completions engine, going through the shared client and rate limiter."""
+    name = "openai"
+    actions = ("summarize", "paraphrase", "code_summarize")
+
+    def __init__(self, model=MODEL, client_factory=get_client, limiter=backend_limiter,
+                 incremental=INCREMENTAL_SECTIONS):
+        self.model = model
+        self.incremental = incremental
+        self.client_factory = client_factory
+        self.limiter = limiter
+        self.latency_ewma = None  # seconds, smoothed over recent calls
+        self.latency_sampled_at = 0.0
+
+    def prompt(self, action, text, max_length=150, min_length=100, style="default", language=None):
+        """Build the token-budgeted prompt for an action; large sources are sent as an outline."""
+        with metrics.span("prompt_build", action=action):
+            if action == "code_summarize" and CODE_OUTLINE_ENABLED:
+                text = code_outliner.compact(text, language)
+            return build_prompt(action, text, max_length, min_length, style, language)
+
+    def _create(self, prompt, **options):
+        metrics.inc("backend_requests", backend=self.name)
+        metrics.inc("prompt_tokens", prompt.input_tokens, backend=self.name)
+        return self.limiter.call(
+            lambda: self.client_factory().chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": prompt.system},
+                    {"role": "user", "content": prompt.user}
+                ],
+                max_tokens=prompt.max_tokens,
+                temperature=0.7,
+                **options
+            ),
+            tokens=prompt.total_tokens
+        )
+
+    def _record_latency(self, seconds):
+        if self.latency_ewma is None:
+            self.latency_ewma = seconds
+        else:
+            self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * seconds
+        self.latency_sampled_at = time.monotonic()
+
+    def complete(self, prompt):
+        """Send a single chat completion and return its text."""
+        started = time.perf_counter()
+        response = self._create(prompt)
+        self._record_latency(time.perf_counter() - started)
+        metrics.observe("backend_request", time.perf_counter() - started, backend=self.name, mode="complete")
+        return response.choices[0].message.content.strip()
+
+    def stream_complete(self, prompt):
+        """Yield completion text deltas as the backend streams them."""
+        started = time.perf_counter()
+        stream = self._create(prompt, stream=True)
+        try:
+            for event in stream:
+                if event.choices and event.choices[0].delta.content:
+                    yield event.choices[0].delta.content
+        finally:
+            stream.close()
+            self._record_latency(time.perf_counter() - started)
+            metrics.observe("backend_request", time.perf_counter() - started, backend=self.name, mode="stream")
+
+    def _summarize_long(self, text, max_length, min_length, style):
+        """
+        Map-reduce summary for inputs larger than a single prompt.
+
+        With INCREMENTAL_SECTIONS the input is cut at content-defined
+        boundaries and every section summary and merge is cached by its own
+        content, so summarizing an edited version of a document only sends
+        the sections that changed and the merges above them.
+        """
+        def summarize_chunk(chunk):
+            return self.complete(self.prompt("section", chunk))
+
+        def merge(partials):
+            return self.complete(
+                self.prompt("merge", "\n\n".join(partials), max_length, min_length, style)
+            )
+
+        if not self.incremental:
+            return map_reduce(split_into_chunks(text), summarize_chunk, merge)
+
+        def cached_section(section):
+            key = make_key(section, action="section", backend=self.name, model=self.model)
+            return self._reuse("section", key, lambda: summarize_chunk(section))
+
+        def cached_merge(partials):
+            key = make_key("\n\n".join(partials), action="merge", backend=self.name, model=self.model,
+                           max_length=max_length, min_length=min_length, style=style)
+            return self._reuse("merge", key, lambda: merge(partials))
+
+        return map_reduce(split_into_sections(text), cached_section, cached_merge)
+
+    def _reuse(self, stage, key, compute):
+        computed = []
+
+        def tracked():
+            computed.append(True)
+            return compute()
+
+        value = summary_cache.get_or_compute(key, tracked)
+        metrics.inc("incremental_parts", stage=stage, result="computed" if computed else "reused")
+        return value
+
+    def _is_long(self, action, text):
+        return action == "summarize" and estimate_tokens(text) > CHUNK_MAX_TOKENS
+
+    def run(self, action, text, max_length=150, min_length=100, style="default", language=None):
+        if self._is_long(action, text):
+            return self._summarize_long(text, max_length, min_length, style)
+        return self.complete(self.prompt(action, text, max_length, min_length, style, language))
+
+    def stream(self, action, text, max_length=150, min_length=100, style="default", language=None):
+        if self._is_long(action, text):
+            yield self._summarize_long(text, max_length, min_length, style)
+            return
+        yield from self.stream_complete(self.prompt(action, text, max_length, min_length, style, language))
+
+class ExtractiveBackend(SummaryBackend):
+    """Offline engine: TextRank over TF-IDF sentence vectors, no network involved."""
+    name = "extractive"
+    model = "textrank-tfidf"
+    actions = ("summarize",)
+
+    def __init__(self, min_ratio=LOCAL_MIN_RATIO):
+        self.min_ratio = min_ratio
+
+    def can_shorten(self, text, max_length):
+        """True if text is long enough that picking sentences yields a real summary."""
+        return len(text.split()) >= max_length * self.min_ratio
+
+    def run(self, action, text, max_length=150, min_length=100, style="default", language=None):
+        with metrics.span("backend_request", backend=self.name, mode="complete"):
+            summary = extractive_summary(text, max_words=max_length)
+        # Sentence selection cannot shorten a text that fits the budget; never hand the input back
+        if len(summary.split()) >= len(text.split()):
+            raise ValueError("Text is too short for an extractive summary.")
+        return summary
+
+class BackendRouter:
+    """
+    Chooses the engine for each request.
+
+    In "auto" mode requests go to the remote engine unless the local engine
+    supports the action and can actually shorten the input (at least
+    min_ratio times max_length words), and then only when the input is
+    short (local_max_words) or the remote engine's recent latency exceeds
+    the latency budget. Latency samples older than latency_window seconds
+    are ignored, so a slow spell does not pin every request to the local
+    engine.
+    """
+
+    def __init__(self, remote=None, local=None, mode=BACKEND_MODE,
+                 local_max_words=LOCAL_MAX_WORDS, latency_budget_ms=LATENCY_BUDGET_MS,
+                 latency_window=60.0):
+        self.remote = remote or RemoteBackend()
+        self.local = local or ExtractiveBackend()
+        self.mode = mode
+        self.local_max_words = local_max_words
+        self.latency_budget = latency_budget_ms / 1000.0
+        self.latency_window = latency_window
+        self._lock = threading.Lock()
+        self.routed = {self.remote.name: 0, self.local.name: 0}
+
+    def choose(self, action, text, max_length=150):
+        """Return the backend that should handle this request."""
+        backend = self._choose(action, text, max_length)
+        metrics.inc("routed_requests", backend=backend.name)
+        with self._lock:
+            self.routed[backend.name] += 1
+        return backend
+
+    def _choose(self, action, text, max_length):
+        if self.mode == "remote" or not self.local.supports(action):
+            return self.remote
+        if self.mode == "local":
+            return self.local
+        if not self.local.can_shorten(text, max_length):
+            return self.remote
+        if len(text.split()) <= self.local_max_words:
+            return self.local
+        latency = self.remote.latency_ewma
+        fresh = time.monotonic() - self.remote.latency_sampled_at < self.latency_window
+        if self.latency_budget and latency is not None and fresh and latency > self.latency_budget:
+            return self.local
+        return self.remote
+
+    def fallback(self, action, error, text, max_length=150):
+        """Return the local backend if it can take over after a connection or server failure, else None."""
+        unavailable = isinstance(error, openai.APIConnectionError) or (
+            isinstance(error, openai.APIStatusError) and error.status_code >= 500
+        )
+        if unavailable and self.local.supports(action) and self.local.can_shorten(text, max_length):
+            return self.local
+        return None
+
+router = BackendRouter()
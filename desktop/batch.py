@@ -0,0 +1,179 @@
+"""
+Headless batch summarization of whole directories or JSONL files.
+
+Usage:
+    python batch.py INPUT OUTPUT.jsonl [--action summarize] [--concurrency 8]
+
+INPUT is either a directory (every .txt/.md file below it is summarized)
+or a JSONL file whose lines look like {"id": ..., "text": ...}. Results
+are appended to OUTPUT as they finish, one JSON object per line. Running
+the same command again resumes: items already recorded as "ok" in OUTPUT
+are skipped.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from cache import make_key
+from singleflight import AsyncSingleFlight
+from summarizer import run_action
+
+TEXT_EXTENSIONS = (".txt", ".md", ".markdown")
+
+def iter_directory(root, extensions=TEXT_EXTENSIONS):
+    """Yield (id, text, None) for every matching file below root, in a stable order."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(extensions):
+                path = os.path.join(dirpath, filename)
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    yield os.path.relpath(path, root), f.read(), None
+
+def iter_jsonl(path):
+    """
+    Yield (id, text, error) for every line of a JSONL file; the line number is the fallback id.
+
+    A line that is not a JSON object with a string "text" is yielded with
+    text None and the reason in error, so one bad line does not stop the run.
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield str(line_number), None, f"Invalid JSON on line {line_number}: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield str(line_number), None, f"Line {line_number} is not a JSON object"
+                continue
+            item_id = str(record.get("id", line_number))
+            if not isinstance(record.get("text"), str):
+                yield item_id, None, f'Line {line_number} has no "text" string'
+                continue
+            yield item_id, record["text"], None
+
+def iter_inputs(source):
+    if os.path.isdir(source):
+        return iter_directory(source)
+    return iter_jsonl(source)
+
+def load_checkpoint(output_path):
+    """Return the ids already summarized successfully in an existing output file."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partial line from a crash mid-write
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+async def run_batch(source, output_path, concurrency=8, **settings):
+    """
+    Summarizes every input concurrently and appends results to output_path.
+
+    Args:
+        source (str): Directory or JSONL file
+        output_path (str): JSONL file results are appended to
+        concurrency (int): Maximum requests in flight
+        **settings: Passed to summarizer.run_action (action, max_length, ...)
+
+    Returns:
+        dict: Counts of processed, skipped and failed items
+    """
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    done = load_checkpoint(output_path)
+    pending = asyncio.Queue(maxsize=concurrency * 2)
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+    # Duplicate inputs wait for the first copy instead of tying up executor threads
+    flight = AsyncSingleFlight("batch")
+
+    with open(output_path, "a+", encoding="utf-8") as output:
+        # Terminate a partial last line left by a crash so new records stay parseable
+        if output.tell() > 0:
+            output.seek(output.tell() - 1)
+            if output.read(1) != "\n":
+                output.write("\n")
+
+        def record(result):
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+
+        async def produce():
+            for item_id, text, error in iter_inputs(source):
+                if item_id in done:
+                    counts["skipped"] += 1
+                    continue
+                if error is not None:
+                    counts["error"] += 1
+                    record({"id": item_id, "status": "error", "error": error})
+                    continue
+                await pending.put((item_id, text))
+            for _ in range(concurrency):
+                await pending.put(None)
+
+        async def consume():
+            while True:
+                item = await pending.get()
+                if item is None:
+                    return
+                item_id, text = item
+                started = time.perf_counter()
+                try:
+                    summary = await flight.do(
+                        make_key(text, **settings),
+                        lambda: loop.run_in_executor(executor, lambda: run_action(text=text, **settings)),
+                    )
+                    result = {"id": item_id, "status": "ok", "summary": summary}
+                except Exception as e:
+                    result = {"id": item_id, "status": "error", "error": str(e)}
+                result["seconds"] = round(time.perf_counter() - started, 3)
+                counts[result["status"]] += 1
+                record(result)
+
+        try:
+            await asyncio.gather(produce(), *(consume() for _ in range(concurrency)))
+        finally:
+            executor.shutdown(wait=False)
+
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a directory or JSONL file in bulk.")
+    parser.add_argument("input", help="directory of .txt/.md files or a JSONL file")
+    parser.add_argument("output", help="JSONL file to append results to")
+    parser.add_argument("--action", default="summarize", choices=["summarize", "paraphrase", "code_summarize"])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--style", default="default")
+    parser.add_argument("--language", default=None)
+    parser.add_argument("--min-length", type=int, default=100)
+    parser.add_argument("--max-length", type=int, default=150)
+    args = parser.parse_args()
+
+    counts = asyncio.run(run_batch(
+        args.input,
+        args.output,
+        concurrency=args.concurrency,
+        action=args.action,
+        style=args.style,
+        language=args.language,
+        min_length=args.min_length,
+        max_length=args.max_length,
+    ))
+    print(json.dumps(counts))
+    return 1 if counts["error"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
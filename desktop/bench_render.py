@@ -0,0 +1,80 @@
+"""
+Compares the legacy per-character text animation with BatchedTextRenderer.
+
+Usage:
+    python bench_render.py [--chars 1500] [--skip-legacy]
+
+Needs a display, since it renders into a real (withdrawn) Tk window.
+"""
+import argparse
+import json
+import time
+import tkinter as tk
+from renderer import BatchedTextRenderer
+
+SAMPLE = (
+    "The quick brown fox jumps over the lazy dog while the committee reviews "
+    "the quarterly report and drafts a concise summary of its key findings. "
+)
+
+def make_text(chars):
+    return (SAMPLE * (chars // len(SAMPLE) + 1))[:chars]
+
+def run_until(root, done, timeout):
+    deadline = time.perf_counter() + timeout
+    while not done() and time.perf_counter() < deadline:
+        root.update()
+        time.sleep(0.001)
+
+def bench_legacy(root, text):
+    """The previous animate_text_insertion: one after(20) callback per character."""
+    widget = tk.Text(root)
+    state = {"callbacks": 0, "done": False}
+
+    def insert_char(idx=0):
+        state["callbacks"] += 1
+        if idx < len(text):
+            widget.insert(tk.END, text[idx])
+            root.after(20, lambda: insert_char(idx + 1))
+        else:
+            state["done"] = True
+
+    started = time.perf_counter()
+    insert_char()
+    run_until(root, lambda: state["done"], timeout=len(text) * 0.05 + 5)
+    elapsed = time.perf_counter() - started
+    widget.destroy()
+    return {"seconds": round(elapsed, 3), "callbacks": state["callbacks"]}
+
+def bench_batched(root, text, **options):
+    widget = tk.Text(root)
+    renderer = BatchedTextRenderer(widget, **options)
+
+    started = time.perf_counter()
+    renderer.write(text)
+    run_until(root, renderer.is_idle, timeout=30)
+    elapsed = time.perf_counter() - started
+    widget.destroy()
+    return {"seconds": round(elapsed, 3), "callbacks": renderer.callbacks}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chars", type=int, default=1500)
+    parser.add_argument("--skip-legacy", action="store_true", help="skip the slow per-character run")
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    root.withdraw()
+    text = make_text(args.chars)
+
+    results = {"chars": args.chars}
+    if not args.skip_legacy:
+        results["legacy"] = bench_legacy(root, text)
+    results["batched"] = bench_batched(root, text, instant_threshold=args.chars + 1)
+    results["instant"] = bench_batched(root, text, instant_threshold=0)
+    root.destroy()
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
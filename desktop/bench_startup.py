@@ -0,0 +1,100 @@
+"""
+Measures desktop startup: per-module import cost and time to first window.
+
+Usage:
+    python bench_startup.py [--runs 5] [--top 15] [--exe dist/AISummarizer/AISummarizer]
+
+The import breakdown comes from `python -X importtime` for the modules on
+the startup path (gui) and the ones the warm-up thread loads later
+(summarizer). Time to first window launches main.py (or a packaged
+executable via --exe) with SHORTIFY_STARTUP_PROBE=1, which makes it
+exit as soon as its window is mapped; this part needs a display.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def bench_env(**extra):
+    # config.py refuses to load without a key; nothing here calls the API
+    return dict(os.environ, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "startup-benchmark"), **extra)
+
+def import_times(module, top=15):
+    """
+    Imports module in a fresh interpreter under -X importtime.
+
+    Returns:
+        dict: Total import time and the slowest top-level packages, in ms
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, capture_output=True, text=True, env=bench_env(),
+    )
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1]}
+
+    packages = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        # Self times never double count, so they add up per package and in total
+        total += int(self_us)
+        root = name.strip().split(".")[0]
+        packages[root] = packages.get(root, 0) + int(self_us)
+
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "total_ms": round(total / 1000, 1),
+        "slowest_packages_ms": {name: round(us / 1000, 1) for name, us in slowest},
+    }
+
+def first_window(command, runs):
+    """Launch command runs times; return wall-clock ms until each reported its first window."""
+    samples = []
+    env = bench_env(SHORTIFY_STARTUP_PROBE="1")
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = subprocess.Popen(command, cwd=HERE, env=env, stdout=subprocess.PIPE, text=True)
+        for line in process.stdout:
+            if line.startswith("first_window_ms="):
+                samples.append((time.perf_counter() - started) * 1000)
+                break
+        process.wait(timeout=60)
+    if not samples:
+        return {"error": "no window was reported (is a display available?)"}
+    return {
+        "runs": len(samples),
+        "median_ms": round(statistics.median(samples), 1),
+        "min_ms": round(min(samples), 1),
+        "max_ms": round(max(samples), 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest packages to list per module")
+    parser.add_argument("--exe", help="packaged executable to time instead of main.py")
+    parser.add_argument("--skip-window", action="store_true", help="only report import times")
+    args = parser.parse_args()
+
+    results = {
+        "imports": {
+            "gui (startup path)": import_times("gui", args.top),
+            "summarizer (warm-up)": import_times("summarizer", args.top),
+        }
+    }
+    if not args.skip_window:
+        command = [os.path.abspath(args.exe)] if args.exe else [sys.executable, "main.py"]
+        results["first_window"] = first_window(command, args.runs)
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
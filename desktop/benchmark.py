@@ -0,0 +1,237 @@
+"""
+Reproducible latency and throughput benchmarks for the summarization pipeline.
+
+Usage:
+    python benchmark.py [--scenarios short,long,batch,stream,cache,local,web]
+                        [--output results.json] [--baseline baseline.json]
+
+Every scenario runs against a local mock OpenAI server (see mock_server.py),
+so results do not depend on the network or cost anything. The "web"
+group (not run by default) drives the Flask app in ../web through its
+test client and needs the web dependencies installed. Results are
+printed as JSON; with --baseline, any scenario whose p95 latency or
+throughput regressed beyond --tolerance makes the run exit with status 1.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from mock_server import start_mock_server, WORDS
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+def make_document(rng, sentences):
+    out = []
+    for _ in range(sentences):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+        out.append(" ".join(words).capitalize() + ".")
+    # Blank line every few sentences so the chunker sees paragraphs
+    return "\n\n".join(" ".join(out[i:i + 5]) for i in range(0, len(out), 5))
+
+class Scenario:
+    """Collects per-request latencies, errors and peak memory for one scenario."""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.errors = 0
+        self.wall = 0.0
+        self.peak_bytes = 0
+
+    def timed(self, fn):
+        started = time.perf_counter()
+        try:
+            fn()
+        except Exception:
+            self.errors += 1
+        self.latencies.append(time.perf_counter() - started)
+
+    def report(self):
+        ms = [v * 1000 for v in self.latencies]
+        return {
+            "requests": len(ms),
+            "errors": self.errors,
+            "p50_ms": round(percentile(ms, 50), 2),
+            "p95_ms": round(percentile(ms, 95), 2),
+            "p99_ms": round(percentile(ms, 99), 2),
+            "throughput_rps": round(len(ms) / self.wall, 2) if self.wall else None,
+            "peak_memory_kb": round(self.peak_bytes / 1024, 1),
+        }
+
+def run_scenario(name, body, setup=None):
+    """Run setup untimed, then time body; memory is the peak above the starting level."""
+    scenario = Scenario(name)
+    if setup is not None:
+        setup()
+    baseline_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    body(scenario)
+    scenario.wall = time.perf_counter() - started
+    scenario.peak_bytes = tracemalloc.get_traced_memory()[1] - baseline_bytes
+    return scenario.report()
+
+def build_scenarios(args):
+    # Imported late: config reads the environment prepared by main()
+    from summarizer import run_action, stream_action
+    from cache import summary_cache
+    from backends import router
+
+    rng = random.Random(args.seed)
+    short_texts = [make_document(rng, 4) for _ in range(args.requests)]
+    long_text = make_document(rng, args.long_sentences)
+
+    def remote_setup():
+        router.mode = "remote"
+        summary_cache.clear()
+
+    def warm_cache():
+        remote_setup()
+        for text in short_texts:
+            run_action("summarize", text)
+
+    def local_setup():
+        router.mode = "local"
+        summary_cache.clear()
+
+    # Pay client construction and first-connection costs before anything is timed
+    remote_setup()
+    run_action("paraphrase", "warm-up request for the shared client")
+
+    def short(scenario):
+        for text in short_texts:
+            scenario.timed(lambda: run_action("summarize", text))
+
+    def local_short(scenario):
+        # The extractive engine only takes inputs it can shorten, so ask for a brief result
+        for text in short_texts:
+            scenario.timed(lambda: run_action("summarize", text, max_length=20, min_length=10))
+
+    def long_document(scenario):
+        scenario.timed(lambda: run_action("summarize", long_text))
+
+    def batch(scenario):
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for text in short_texts:
+                pool.submit(scenario.timed, lambda text=text: run_action("paraphrase", text))
+
+    def stream(scenario):
+        # Latency here is time to first piece, which is what the GUI user sees
+        for text in short_texts:
+            started = time.perf_counter()
+            pieces = stream_action("paraphrase", text)
+            next(pieces)
+            scenario.latencies.append(time.perf_counter() - started)
+            for _ in pieces:
+                pass
+
+    web_client = {}
+
+    def web_setup():
+        web_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "web")
+        # app.py imports its sibling web modules by name
+        sys.path.insert(0, web_dir)
+        spec = importlib.util.spec_from_file_location("web_app", os.path.join(web_dir, "app.py"))
+        web_app = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(web_app)
+        web_client["client"] = web_app.app.test_client()
+
+    def web(scenario):
+        client = web_client["client"]
+        for _ in range(args.requests):
+            scenario.timed(lambda: client.get("/login"))
+
+    # group -> [(scenario name, body, untimed setup)]
+    return {
+        "short": [("short", short, remote_setup)],
+        "long": [("long_document", long_document, remote_setup)],
+        "batch": [("concurrent_batch", batch, remote_setup)],
+        "stream": [("stream_first_piece", stream, remote_setup)],
+        "cache": [("cache_cold", short, remote_setup), ("cache_warm", short, warm_cache)],
+        "local": [("local_extractive", local_short, local_setup)],
+        "web": [("web_login_page", web, web_setup)],
+    }
+
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions against a stored baseline."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']}ms vs baseline {previous['p95_ms']}ms")
+        if previous.get("throughput_rps") and current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {current['throughput_rps']}rps vs baseline {previous['throughput_rps']}rps"
+            )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the summarization pipeline against a mock server.")
+    parser.add_argument("--scenarios", default="short,long,batch,stream,cache,local")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--long-sentences", type=int, default=1500)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--tokens-per-second", type=float, default=400)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    server, url = start_mock_server(
+        latency_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ["OPENAI_BASE_URL"] = url
+    os.environ["CACHE_PATH"] = ""
+    # Generated inputs share sentences, so near-duplicate reuse would hide backend latency
+    os.environ.setdefault("SIMILARITY_ENABLED", "0")
+    os.environ.setdefault("RATE_LIMIT_RPM", "1000000")
+    os.environ.setdefault("RATE_LIMIT_TPM", "1000000000")
+    os.environ.setdefault("MAX_CONCURRENCY", str(args.concurrency))
+
+    tracemalloc.start()
+    available = build_scenarios(args)
+    results = {
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "scenarios": {},
+    }
+    for group in args.scenarios.split(","):
+        for name, body, setup in available[group.strip()]:
+            results["scenarios"][name] = run_scenario(name, body, setup)
+    tracemalloc.stop()
+    server.shutdown()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
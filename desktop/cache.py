@@ -0,0 +1,162 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import CACHE_MAX_ENTRIES, CACHE_PATH
+from metrics import metrics
+from singleflight import SingleFlight
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different selections share a key."""
+    return " ".join(text.split())
+
+def make_key(text, **params):
+    """
+    Builds a content-addressed cache key.
+
+    Args:
+        text (str): Input text
+        **params: Request parameters (action, model, style, language, lengths)
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    payload = json.dumps(params, sort_keys=True, default=str)
+    digest = hashlib.sha256()
+    digest.update(payload.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+class SummaryCache:
+    """Two-tier summary cache: bounded in-memory LRU in front of optional SQLite storage."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, path=CACHE_PATH):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._computing = SingleFlight("cache")
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+        self._miss_seconds = 0.0
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, cost REAL NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                value, cost = self._entries[key]
+                self.hits += 1
+                metrics.inc("cache_lookups", result="hit")
+                self.saved_seconds += cost
+                return value
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, cost FROM summaries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, cost = row
+                    self._remember(key, value, cost)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    metrics.inc("cache_lookups", result="disk_hit")
+                    self.saved_seconds += cost
+                    return value
+
+            self.misses += 1
+            metrics.inc("cache_lookups", result="miss")
+            return None
+
+    def put(self, key, value, cost=0.0):
+        """
+        Stores a value in both tiers.
+
+        Args:
+            key (str): Cache key from make_key
+            value (str): Result to store
+            cost (float): Seconds it took to compute, used for latency accounting
+        """
+        with self._lock:
+            self._miss_seconds += cost
+            self._remember(key, value, cost)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO summaries (key, value, cost, created) VALUES (?, ?, ?, ?)",
+                    (key, value, cost, time.time())
+                )
+                self._db.commit()
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, computing and storing it on a miss.
+
+        Concurrent misses for the same key, such as repeated sections of one
+        document summarized in parallel, share a single compute() call.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        return self._computing.do(key, lambda: self._compute(key, compute))
+
+    def _compute(self, key, compute):
+        # Another caller may have stored the value while this one waited to lead
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            return entry[0]
+        started = time.perf_counter()
+        value = compute()
+        self.put(key, value, time.perf_counter() - started)
+        return value
+
+    def _remember(self, key, value, cost):
+        self._entries[key] = (value, cost)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every cached entry from memory and disk."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM summaries")
+                self._db.commit()
+
+    def stats(self):
+        """Return hit/miss/eviction counters and the latency saved by hits."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "saved_seconds": round(self.saved_seconds, 3),
+                "miss_seconds": round(self._miss_seconds, 3),
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+summary_cache = SummaryCache()
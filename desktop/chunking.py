@@ -0,0 +1,143 @@
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from config import CHUNK_MAX_TOKENS, MAP_WORKERS, REDUCE_FAN_IN, REDUCE_MAX_DEPTH
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+CHARS_PER_TOKEN = 4
+SECTION_BOUNDARY_ODDS = 4  # after a section's minimum size, about one paragraph in four ends it
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English text)."""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+def _split_oversized(piece, max_tokens):
+    """Break a single paragraph that does not fit into sentence- or word-sized parts."""
+    parts = SENTENCE_END.split(piece)
+    if len(parts) == 1:
+        # No sentence boundaries: fall back to packing words up to the budget
+        limit = max_tokens * CHARS_PER_TOKEN
+        parts, current, length = [], [], 0
+        for word in piece.split():
+            if current and length + 1 + len(word) > limit:
+                parts.append(" ".join(current))
+                current, length = [], 0
+            length += len(word) + (1 if current else 0)
+            current.append(word)
+        if current:
+            parts.append(" ".join(current))
+    return parts
+
+def _pieces(text, max_tokens):
+    """Paragraphs of text, with any that exceed max_tokens broken up further."""
+    pieces = []
+    for paragraph in PARAGRAPH_BREAK.split(text.strip()):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(_split_oversized(paragraph, max_tokens))
+    return pieces
+
+def split_into_chunks(text, max_tokens=CHUNK_MAX_TOKENS):
+    """
+    Splits text into chunks on paragraph and sentence boundaries.
+
+    Args:
+        text (str): Text to split
+        max_tokens (int): Estimated token budget per chunk
+
+    Returns:
+        list[str]: Chunks, each within the token budget where possible
+    """
+    pieces = _pieces(text, max_tokens)
+    chunks = []
+    current = []
+    current_chars = 0
+    for piece in pieces:
+        # Estimate on the joined length so separators count against the budget
+        if current and (current_chars + 2 + len(piece)) // CHARS_PER_TOKEN > max_tokens:
+            chunks.append("\n\n".join(current))
+            current = []
+            current_chars = 0
+        current_chars += len(piece) + (2 if current else 0)
+        current.append(piece)
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+def _ends_section(piece):
+    return zlib.crc32(" ".join(piece.split()).encode("utf-8")) % SECTION_BOUNDARY_ODDS == 0
+
+def split_into_sections(text, max_tokens=CHUNK_MAX_TOKENS):
+    """
+    Splits text into content-defined sections.
+
+    split_into_chunks packs paragraphs greedily, so inserting one paragraph
+    near the start shifts every later boundary. Here a section ends after
+    a paragraph whose own hash says so (once the section holds a quarter
+    of the budget), so boundaries depend on nearby content only, and an
+    edit changes the section it falls in and rarely its neighbours.
+
+    Args:
+        text (str): Text to split
+        max_tokens (int): Estimated token budget per section
+
+    Returns:
+        list[str]: Sections, each within the token budget where possible
+    """
+    min_chars = max_tokens * CHARS_PER_TOKEN // 4
+    sections = []
+    current = []
+    current_chars = 0
+    for piece in _pieces(text, max_tokens):
+        if current and (current_chars + 2 + len(piece)) // CHARS_PER_TOKEN > max_tokens:
+            sections.append("\n\n".join(current))
+            current = []
+            current_chars = 0
+        current_chars += len(piece) + (2 if current else 0)
+        current.append(piece)
+        if current_chars >= min_chars and _ends_section(piece):
+            sections.append("\n\n".join(current))
+            current = []
+            current_chars = 0
+    if current:
+        sections.append("\n\n".join(current))
+    return sections
+
+def map_reduce(chunks, map_fn, reduce_fn, workers=MAP_WORKERS,
+               fan_in=REDUCE_FAN_IN, max_depth=REDUCE_MAX_DEPTH):
+    """
+    Summarizes chunks concurrently and merges the partial results as a tree.
+
+    The last merge always runs, even for a single chunk, because it is the
+    step that applies the caller's length and style.
+
+    Args:
+        chunks (list[str]): Input chunks
+        map_fn (callable): Summarizes one chunk
+        reduce_fn (callable): Merges a list of partial summaries into one
+        workers (int): Maximum concurrent calls
+        fan_in (int): Partial summaries merged per reduce call
+        max_depth (int): Maximum reduce levels; the last level merges everything left
+
+    Returns:
+        str: Final merged summary
+    """
+    if not chunks:
+        return ""
+    fan_in = max(2, fan_in)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        partials = list(pool.map(map_fn, chunks))
+
+        depth = 1
+        while depth < max_depth and len(partials) > fan_in:
+            groups = [partials[i:i + fan_in] for i in range(0, len(partials), fan_in)]
+            partials = list(pool.map(reduce_fn, groups))
+            depth += 1
+
+        return reduce_fn(partials)
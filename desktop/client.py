@@ -0,0 +1,56 @@
+import threading
+import httpx
+import openai
+from config import (
+    API_KEY,
+    OPENAI_BASE_URL,
+    HTTP_POOL_SIZE,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+)
+
+_client = None
+_client_lock = threading.Lock()
+
+def build_http_client(pool_size=HTTP_POOL_SIZE, connect_timeout=HTTP_CONNECT_TIMEOUT,
+                      read_timeout=HTTP_READ_TIMEOUT, keepalive_expiry=HTTP_KEEPALIVE_EXPIRY):
+    """Create an httpx client that keeps connections alive between requests."""
+    limits = httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=keepalive_expiry,
+    )
+    timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+    return httpx.Client(limits=limits, timeout=timeout)
+
+def get_client():
+    """
+    Returns the process-wide OpenAI client.
+
+    The client is created on first use and shared by every summarizer call,
+    so repeated selections reuse pooled connections instead of paying a new
+    TLS handshake each time.
+
+    Returns:
+        openai.OpenAI: Shared client instance
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = openai.OpenAI(
+                    api_key=API_KEY,
+                    base_url=OPENAI_BASE_URL,
+                    http_client=build_http_client(),
+                    max_retries=0,  # Retries are handled by ratelimit.BackendLimiter
+                )
+    return _client
+
+def close_client():
+    """Close the shared client and release its pooled connections."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
@@ -0,0 +1,91 @@
+import time
+import uuid
+from metrics import metrics
+from config import CLIPBOARD_TIMEOUT_MS, CLIPBOARD_POLL_MS, CLIPBOARD_MAX_POLL_MS, CLIPBOARD_RESTORE
+
+def _paste():
+    import pyperclip  # deferred to keep startup fast; usually preloaded by warmup.py
+    return pyperclip.paste()
+
+def _copy(text):
+    import pyperclip
+    pyperclip.copy(text)
+
+def _send_copy():
+    import keyboard
+    keyboard.send('ctrl+c')
+
+class ClipboardCapture:
+    """
+    Copies the current selection and hands it back as soon as it lands.
+
+    The clipboard is polled from the Tk loop with after(), starting at
+    poll_ms and backing off to max_poll_ms, until its content changes or
+    timeout_ms passes. When the clipboard held text beforehand it is first
+    replaced by a unique marker, so copying a selection identical to the
+    old clipboard still counts as a change. That text is put back once the
+    selection has been read (if restore is set), and always when nothing
+    was copied, so the marker never outlives a capture. Non-text content
+    (which reads as empty) is left alone, since it could not be restored.
+    """
+
+    def __init__(self, root, timeout_ms=CLIPBOARD_TIMEOUT_MS, poll_ms=CLIPBOARD_POLL_MS,
+                 max_poll_ms=CLIPBOARD_MAX_POLL_MS, restore=CLIPBOARD_RESTORE,
+                 paste=_paste, copy=_copy, send_copy=_send_copy):
+        self.root = root
+        self.timeout_ms = timeout_ms
+        self.poll_ms = poll_ms
+        self.max_poll_ms = max_poll_ms
+        self.restore = restore
+        self.paste = paste
+        self.copy = copy
+        self.send_copy = send_copy
+        self._capture_id = 0
+        self._waiting = False
+        self._previous = None
+
+    def capture(self, on_text):
+        """
+        Starts a capture, superseding any capture still waiting.
+
+        Args:
+            on_text (callable): Receives the copied text on the Tk thread;
+                an empty string if nothing was copied before the timeout
+        """
+        self._capture_id += 1
+        capture_id = self._capture_id
+        started = time.perf_counter()
+
+        # A superseded capture may have left its marker behind; keep the user's text
+        previous = self._previous if self._waiting else self.paste()
+        self._waiting = True
+        self._previous = previous
+        baseline = previous
+        if previous:
+            baseline = f"shortify-{uuid.uuid4().hex}"
+            self.copy(baseline)
+        self.send_copy()
+
+        def finish(text, result):
+            self._waiting = False
+            self._previous = None
+            # The marker is ours to remove whatever the setting; restore only decides
+            # whether a copied selection is replaced by the user's earlier text
+            if previous and (self.restore or result == "timeout"):
+                self.copy(previous)
+            metrics.observe("clipboard_capture", time.perf_counter() - started, result=result)
+            on_text(text)
+
+        def poll(delay_ms):
+            if capture_id != self._capture_id:
+                return  # a newer capture owns the clipboard now
+            current = self.paste()
+            if current != baseline:
+                finish(current, "changed")
+            elif (time.perf_counter() - started) * 1000 >= self.timeout_ms:
+                finish("", "timeout")
+            else:
+                next_delay = min(self.max_poll_ms, max(delay_ms + 1, int(delay_ms * 1.5)))
+                self.root.after(next_delay, lambda: poll(next_delay))
+
+        self.root.after(self.poll_ms, lambda: poll(self.poll_ms))
@@ -8,3 +8,66 @@ API_KEY = os.getenv('OPENAI_API_KEY')
 
 if not API_KEY:
     raise ValueError("Please set OPENAI_API_KEY in your .env file")
+
+# Model backend
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')  # None uses the default OpenAI endpoint
+MODEL = os.getenv('SUMMARIZER_MODEL', 'gpt-4.5-preview')
+
+# HTTP connection pool shared by every summarizer call
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '60'))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '60'))
+
+# Summary cache
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '256'))
+CACHE_PATH = os.getenv('CACHE_PATH')  # Set to a file path to persist summaries across restarts
+
+# Near-duplicate reuse (opt-in): a summary is reused for inputs at least this similar (Jaccard over
+# word 3-grams). One inserted "not" barely moves the score, so anything much below 1.0 can return
+# a summary that means the opposite; 1.0 only matches inputs differing in case, punctuation or spacing
+SIMILARITY_ENABLED = os.getenv('SIMILARITY_ENABLED', '0') not in ('0', 'false', 'False', '')
+SIMILARITY_THRESHOLD = float(os.getenv('SIMILARITY_THRESHOLD', '1.0'))
+SIMILARITY_MAX_ENTRIES = int(os.getenv('SIMILARITY_MAX_ENTRIES', '200000'))
+
+# Map-reduce summarization of long inputs
+CHUNK_MAX_TOKENS = int(os.getenv('CHUNK_MAX_TOKENS', '3000'))
+MAP_WORKERS = int(os.getenv('MAP_WORKERS', '4'))
+REDUCE_FAN_IN = int(os.getenv('REDUCE_FAN_IN', '4'))
+REDUCE_MAX_DEPTH = int(os.getenv('REDUCE_MAX_DEPTH', '3'))
+# Split long inputs at content-defined boundaries and cache each section's summary,
+# so re-summarizing an edited document only resends the sections that changed
+INCREMENTAL_SECTIONS = os.getenv('INCREMENTAL_SECTIONS', '1') not in ('0', 'false', 'False', '')
+
+# Code summaries: sources above CODE_OUTLINE_MIN_TOKENS are sent as an outline of
+# imports, signatures, docstrings and calls, trimmed to CODE_TOKEN_BUDGET tokens
+CODE_OUTLINE_ENABLED = os.getenv('CODE_OUTLINE_ENABLED', '1') not in ('0', 'false', 'False', '')
+CODE_OUTLINE_MIN_TOKENS = int(os.getenv('CODE_OUTLINE_MIN_TOKENS', '400'))
+CODE_TOKEN_BUDGET = int(os.getenv('CODE_TOKEN_BUDGET', '1500'))
+CODE_OUTLINE_CACHE_SIZE = int(os.getenv('CODE_OUTLINE_CACHE_SIZE', '64'))
+
+# Background workers for the desktop GUI
+WORKER_THREADS = int(os.getenv('WORKER_THREADS', '2'))
+WORKER_POLL_MS = int(os.getenv('WORKER_POLL_MS', '30'))
+
+# Selection capture: poll the clipboard from CLIPBOARD_POLL_MS, backing off to
+# CLIPBOARD_MAX_POLL_MS, until the copy lands or CLIPBOARD_TIMEOUT_MS passes
+CLIPBOARD_TIMEOUT_MS = int(os.getenv('CLIPBOARD_TIMEOUT_MS', '1000'))
+CLIPBOARD_POLL_MS = int(os.getenv('CLIPBOARD_POLL_MS', '5'))
+CLIPBOARD_MAX_POLL_MS = int(os.getenv('CLIPBOARD_MAX_POLL_MS', '50'))
+CLIPBOARD_RESTORE = os.getenv('CLIPBOARD_RESTORE', '1') not in ('0', 'false', 'False', '')
+
+# Client-side rate limiting and retries
+RATE_LIMIT_RPM = float(os.getenv('RATE_LIMIT_RPM', '500'))
+RATE_LIMIT_TPM = float(os.getenv('RATE_LIMIT_TPM', '200000'))
+MAX_CONCURRENCY = int(os.getenv('MAX_CONCURRENCY', '8'))
+MAX_RETRIES = int(os.getenv('MAX_RETRIES', '5'))
+RETRY_BASE_DELAY = float(os.getenv('RETRY_BASE_DELAY', '0.5'))
+RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', '30'))
+
+# Backend routing: "auto" picks per request, "remote" or "local" forces one engine
+BACKEND_MODE = os.getenv('BACKEND_MODE', 'auto')
+LOCAL_MAX_WORDS = int(os.getenv('LOCAL_MAX_WORDS', '150'))
+# The local engine only takes inputs at least this many times longer than the requested summary
+LOCAL_MIN_RATIO = float(os.getenv('LOCAL_MIN_RATIO', '2'))
+LATENCY_BUDGET_MS = float(os.getenv('LATENCY_BUDGET_MS', '0'))  # 0 disables latency-based routing
@@ -0,0 +1,106 @@
+import re
+import zlib
+import numpy as np
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+WORD = re.compile(r"[A-Za-z0-9']+")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his i if in into is it its
+of on or our she so that the their them then there these they this to was we were
+what when which who will with you your not no can do does did been being than
+""".split())
+
+HASH_FEATURES = 1 << 12  # hashed vocabulary keeps memory flat for any input size
+MAX_GRAPH_SENTENCES = 2000  # above this, skip the n x n similarity graph
+
+def split_sentences(text):
+    return [s.strip() for s in SENTENCE_BOUNDARY.split(text) if s and s.strip()]
+
+def _terms(sentence):
+    return [w for w in WORD.findall(sentence.lower()) if w not in STOPWORDS]
+
+def tfidf_matrix(sentences, features=HASH_FEATURES):
+    """
+    Builds L2-normalized TF-IDF sentence vectors using the hashing trick.
+
+    Args:
+        sentences (list[str]): Sentences to vectorize
+        features (int): Number of hashed feature columns
+
+    Returns:
+        numpy.ndarray: Matrix of shape (len(sentences), features)
+    """
+    rows = []
+    cols = []
+    for row, sentence in enumerate(sentences):
+        for term in _terms(sentence):
+            rows.append(row)
+            cols.append(zlib.crc32(term.encode("utf-8")) % features)
+
+    matrix = np.zeros((len(sentences), features), dtype=np.float32)
+    if rows:
+        np.add.at(matrix, (np.array(rows), np.array(cols)), 1.0)
+
+    document_frequency = np.count_nonzero(matrix, axis=0)
+    idf = np.log((1.0 + len(sentences)) / (1.0 + document_frequency)) + 1.0
+    matrix *= idf.astype(np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def textrank_scores(matrix, damping=0.85, iterations=50, tolerance=1e-6):
+    """Rank sentences by PageRank over their cosine-similarity graph."""
+    count = matrix.shape[0]
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0.0)
+
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    transition = np.where(row_sums > 0, similarity / np.where(row_sums > 0, row_sums, 1.0), 1.0 / count)
+
+    scores = np.full(count, 1.0 / count, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1.0 - damping) / count + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+def centroid_scores(matrix):
+    """Cheaper linear-time scoring: similarity of each sentence to the document centroid."""
+    return matrix @ matrix.mean(axis=0)
+
+def extractive_summary(text, max_words=150):
+    """
+    Picks the highest-ranked sentences of text, up to max_words, in their original order.
+
+    Args:
+        text (str): Text to summarize
+        max_words (int): Word budget for the summary
+
+    Returns:
+        str: Extracted summary
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= 1:
+        return text.strip()
+
+    matrix = tfidf_matrix(sentences)
+    if len(sentences) <= MAX_GRAPH_SENTENCES:
+        scores = textrank_scores(matrix)
+    else:
+        scores = centroid_scores(matrix)
+
+    chosen = []
+    words = 0
+    for index in np.argsort(-scores, kind="stable"):
+        length = len(sentences[index].split())
+        if chosen and words + length > max_words:
+            continue
+        chosen.append(index)
+        words += length
+        if words >= max_words:
+            break
+
+    return " ".join(sentences[i] for i in sorted(chosen))
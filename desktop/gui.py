@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
-import keyboard
-import pyperclip
 import math
+import time
 from utils import resource_path
-from summarizer import summarize_text, paraphrase_text, summarize_code
+from worker import SummaryWorker
+from renderer import BatchedTextRenderer
+from clipboard import ClipboardCapture
+from sprites import SpriteCache
+from metrics import metrics
 
 class FloatingPen(tk.Tk):
     def __init__(self):
@@ -18,6 +20,9 @@ class FloatingPen(tk.Tk):
 
         # Animation-related attributes
         self.hover_scale = 1.0
+        self.hover_target = 1.0
+        self.hovering = False
+        self.hover_job = None  # pending after() id; None while the pen is at rest
         self.opacity = 1.0
         self.fade_direction = -1
 
@@ -28,6 +33,10 @@ class FloatingPen(tk.Tk):
         self.writing_style = "default"
         self.language = None  # Initialize language attribute
 
+        # Summarizer jobs run off the Tk thread
+        self.worker = SummaryWorker(self)
+        self.clipboard_capture = ClipboardCapture(self)
+
         self.style = ttk.Style()
         self.style.configure("Custom.TFrame", background='white')
 
@@ -43,36 +52,59 @@ class FloatingPen(tk.Tk):
         self.attributes('-alpha', 1.0)
         self.attributes('-transparentcolor', 'white')  # Restore transparent color
 
-        # Start hover animation
-        self.animate_hover()
-
     def setup_pen_icon(self):
         image_path = resource_path("assets/pen.png")
-        # Just schedule next check without animation
-        self.after(50, self.animate_hover)
-        return
-            
-        # Subtle scaling and fading animation
-        self.hover_scale += 0.02 * (1.1 - self.hover_scale)
-        
-        # Resize the image
-        resized_width = int(100 * self.hover_scale)
-        resized_height = int(100 * self.hover_scale)
-        resized_image = self.original_pen_image.resize((resized_width, resized_height), Image.Resampling.LANCZOS)
-        self.pen_photo = ImageTk.PhotoImage(resized_image)
-        self.pen_label.config(image=self.pen_photo)
-
-        # Subtle fading effect
-        self.opacity += 0.05 * self.fade_direction
-        if self.opacity <= 0.7:
-            self.fade_direction = 1
-        elif self.opacity >= 1.0:
-            self.fade_direction = -1
-        
+        # Tk decodes the PNG itself, so the first frame needs no PIL; the
+        # scaled hover frames are rendered once, on the first hover
+        source = tk.PhotoImage(file=image_path)
+        self.pen_photo = source.subsample(max(1, -(-source.width() // 100)))
+        self.pen_sprites = SpriteCache(image_path, size=100, min_scale=1.0, max_scale=1.1)
+
+        self.pen_label = tk.Label(self.main_frame, image=self.pen_photo, bg='white', borderwidth=0)
+        self.pen_label.pack()
+        self.pen_label.bind("<Enter>", self.on_hover_enter)
+        self.pen_label.bind("<Leave>", self.on_hover_leave)
+        self.pen_label.bind("<Button-1>", self.start_drag)
+        self.pen_label.bind("<B1-Motion>", self.drag)
+        self.pen_label.bind("<Button-3>", self.on_right_click)
+
+    def wake_hover_animation(self):
+        """Schedule the next hover frame unless one is already pending."""
+        if self.hover_job is None:
+            self.hover_job = self.after(50, self.animate_hover)
+
+    def animate_hover(self):
+        """
+        Advances the hover animation by one frame.
+
+        The loop only runs while the pointer is over the pen or the pen is
+        settling back after it left; once at rest it stops rescheduling
+        itself until the next <Enter> wakes it.
+        """
+        self.hover_job = None
+
+        # Ease the scale toward its target, snapping once the frame would not change
+        self.hover_scale += 0.3 * (self.hover_target - self.hover_scale)
+        if self.pen_sprites.quantize(self.hover_scale) == self.pen_sprites.quantize(self.hover_target):
+            self.hover_scale = self.hover_target
+        frame = self.pen_sprites.frame(self.hover_scale)
+        if frame is not self.pen_photo:
+            self.pen_photo = frame
+            self.pen_label.config(image=frame)
+
+        # Subtle fading effect while hovering; fade back to opaque afterwards
+        if self.hovering:
+            self.opacity += 0.05 * self.fade_direction
+            if self.opacity <= 0.7:
+                self.fade_direction = 1
+            elif self.opacity >= 1.0:
+                self.fade_direction = -1
+        else:
+            self.opacity = min(1.0, self.opacity + 0.05)
         self.attributes('-alpha', self.opacity)
 
-        # Schedule next animation frame
-        self.after(50, self.animate_hover)
+        if self.hovering or self.hover_scale != self.hover_target or self.opacity < 1.0:
+            self.wake_hover_animation()
 
     def create_text_area(self):
         self.text_area = tk.Text(
@@ -95,6 +127,7 @@ class FloatingPen(tk.Tk):
         
         # The scrollbar and text area will be packed together when needed
         self.text_scroll = text_scroll
+        self.renderer = BatchedTextRenderer(self.text_area)
         self.text_area.pack_forget()
 
     def create_settings_panel(self):
@@ -393,35 +426,19 @@ class FloatingPen(tk.Tk):
 
     def process_action(self, action_type):
         self.action_type = action_type
-        keyboard.send('ctrl+c')
-        self.after(200, self.process_clipboard_text)
+        self.action_started = time.perf_counter()
+        # Continues as soon as the copied selection reaches the clipboard
+        self.clipboard_capture.capture(self.process_clipboard_text)
 
-    def process_clipboard_text(self):
-        selected_text = pyperclip.paste()
+    def process_clipboard_text(self, selected_text):
+        started = getattr(self, 'action_started', None)
         if selected_text.strip():
             if self.action_type == "summarize":
-                result = summarize_text(
-                    selected_text, 
-                    max_length=self.max_length,
-                    min_length=self.min_length,
-                    style=self.writing_style
-                )
                 title = f"Summary ({self.writing_style} style)"
             elif self.action_type == "paraphrase":
-                result = paraphrase_text(
-                    selected_text, 
-                    max_length=self.max_length,
-                    min_length=self.min_length,
-                    style=self.writing_style
-                )
                 title = f"Paraphrase ({self.writing_style} style)"
             else:  # code_summarize
                 language_display = self.language if self.language else "auto-detected"
-                result = summarize_code(
-                    selected_text, 
-                    max_length=self.max_length,
-                    language=self.language
-                )
                 title = f"Code Summary ({language_display})"
             
             # Animate text area appearance
@@ -431,25 +448,42 @@ class FloatingPen(tk.Tk):
             self.text_area.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
             self.text_scroll.pack(side=tk.RIGHT, fill=tk.Y, pady=5)
             
+            self.renderer.clear()
             self.text_area.delete(1.0, tk.END)
             
             # Add title
             self.text_area.insert(tk.END, f"{title}:\n\n", "title")
             self.text_area.tag_configure("title", font=("Helvetica", 12, "bold"))
             
-            # Animate text insertion
-            self.animate_text_insertion(result)
+            # Stream the result on a worker thread; a newer selection supersedes this one
+            from summarizer import stream_action
+            action_type = self.action_type
+            settings = dict(
+                max_length=self.max_length,
+                min_length=self.min_length,
+                style=self.writing_style,
+                language=self.language
+            )
+            self.worker.submit(
+                lambda: stream_action(action_type, selected_text, **settings),
+                on_piece=self.append_result_piece,
+                on_done=lambda: self.on_result_done(action_type, started)
+            )
         else:
             self.show_error("No text selected!")
 
+    def append_result_piece(self, piece):
+        """Queue a streamed piece for rendering; called on the Tk thread by the worker."""
+        self.renderer.write(piece)
+
+    def on_result_done(self, action_type, started):
+        """Record end-to-end latency of an action once its result has fully arrived."""
+        if started is not None:
+            metrics.observe("gui_action", time.perf_counter() - started, action=action_type)
+
     def animate_text_insertion(self, text):
-        """Animate text insertion character by character."""
-        def insert_char(idx=0):
-            if idx < len(text):
-                self.text_area.insert(tk.END, text[idx])
-                self.after(20, lambda: insert_char(idx + 1))
-        
-        insert_char()
+        """Animate text insertion in frame-budgeted word batches."""
+        self.renderer.write(text)
 
     def show_message(self):
         # For backward compatibility
@@ -470,6 +504,7 @@ class FloatingPen(tk.Tk):
         self.text_area.configure(bg=bg_color, fg=fg_color)
         self.text_area.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
         self.text_scroll.pack(side=tk.RIGHT, fill=tk.Y, pady=5)
+        self.renderer.clear()
         self.text_area.delete(1.0, tk.END)
         self.text_area.insert(tk.END, f"Error: {message}", "error")
         self.text_area.tag_configure("error", foreground="#ff0000", font=("Helvetica", 12, "bold"))
@@ -489,6 +524,9 @@ class FloatingPen(tk.Tk):
 
     def cancel_action(self):
         self.menu.unpost()
+        if self.worker.cancel():
+            self.renderer.flush()
+            self.text_area.insert(tk.END, "\n\n[Cancelled]", "title")
 
     def hide_text_area(self):
         # Animate text area disappearance
@@ -511,6 +549,7 @@ class FloatingPen(tk.Tk):
                 self.attributes('-alpha', alpha)
                 self.after(20, lambda: fade_out(alpha - 0.1))
             else:
+                self.worker.shutdown()
                 self.destroy()
         
         fade_out()
@@ -549,10 +588,13 @@ class FloatingPen(tk.Tk):
 
     def on_hover_enter(self, event):
         """Handle hover enter event with scaling animation."""
-        self.hover_scale = 1.1
-        self.fade_direction = 1
+        self.hover_target = 1.1
+        self.hovering = True
+        self.fade_direction = -1
+        self.wake_hover_animation()
 
     def on_hover_leave(self, event):
         """Handle hover leave event with scaling animation."""
-        self.hover_scale = 1.0
-        self.fade_direction = -1
\ No newline at end of file
+        self.hover_target = 1.0
+        self.hovering = False
+        self.wake_hover_animation()
\ No newline at end of file
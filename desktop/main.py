@@ -1,5 +1,34 @@
+import time
+
+STARTED = time.perf_counter()
+
+import os
 from gui import FloatingPen
+from metrics import metrics, start_metrics_log
+from warmup import start_warmup
 
-if __name__ == "__main__":
+def run():
+    stop_metrics_log = start_metrics_log(metrics)
     app = FloatingPen()
+    shown = []
+
+    def on_map(event):
+        # <Map> on the root fires for every child widget too; act on the window itself, once
+        if event.widget is not app or shown:
+            return
+        shown.append(True)
+        elapsed = time.perf_counter() - STARTED
+        metrics.observe("startup_first_window", elapsed)
+        # The OpenAI SDK, NumPy, PIL and the clipboard/keyboard hooks load behind the visible window
+        start_warmup()
+        if os.getenv("SHORTIFY_STARTUP_PROBE"):
+            print(f"first_window_ms={elapsed * 1000:.1f}", flush=True)
+            app.after(0, app.destroy)
+
+    app.bind("<Map>", on_map, add="+")
     app.mainloop()
+    if stop_metrics_log is not None:
+        stop_metrics_log.set()
+
+if __name__ == "__main__":
+    run()
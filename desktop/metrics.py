@@ -0,0 +1,174 @@
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Read directly from the environment rather than config.py so the web app
+# can use this module without an OpenAI key configured
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') not in ('0', 'false', 'False', '')
+METRICS_LOG_PATH = os.getenv('METRICS_LOG_PATH')
+METRICS_LOG_INTERVAL = float(os.getenv('METRICS_LOG_INTERVAL', '60'))
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def _label_key(labels):
+    # Values are kept as text so series whose label mixes types (status=429, status="connection") still sort
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+class Metrics:
+    """
+    In-process counters and latency histograms.
+
+    When disabled every call returns immediately and span() hands back a
+    shared no-op context manager, so instrumented hot paths cost one
+    attribute check.
+    """
+
+    def __init__(self, enabled=METRICS_ENABLED, prefix="shortify"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timers = {}
+
+    def inc(self, name, value=1, **labels):
+        """Add value to a counter."""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """Record one duration in a histogram."""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            timer = self._timers.get(key)
+            if timer is None:
+                timer = self._timers[key] = {"count": 0, "sum": 0.0, "buckets": [0] * len(BUCKETS)}
+            timer["count"] += 1
+            timer["sum"] += seconds
+            for index, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    timer["buckets"][index] += 1
+                    break
+
+    def span(self, name, **labels):
+        """Context manager timing its body into the named histogram."""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return self._span(name, labels)
+
+    @contextmanager
+    def _span(self, name, labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timed(self, name, **labels):
+        """Decorator form of span()."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Return all counters and timers as plain data."""
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self._counters.items()
+                ],
+                "timers": [
+                    {"name": name, "labels": dict(labels), "count": t["count"], "sum": round(t["sum"], 6)}
+                    for (name, labels), t in self._timers.items()
+                ],
+            }
+
+    def render_prometheus(self):
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            timers = sorted(self._timers.items())
+
+        seen = set()
+        for (name, labels), value in counters:
+            metric = f"{self.prefix}_{name}_total"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+        for (name, labels), timer in timers:
+            metric = f"{self.prefix}_{name}_seconds"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(BUCKETS, timer["buckets"]):
+                cumulative += count
+                lines.append(f"{metric}_bucket{_format_labels(labels, {'le': bound})} {cumulative}")
+            lines.append(f"{metric}_bucket{_format_labels(labels, {'le': '+Inf'})} {timer['count']}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {timer['sum']:.6f}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {timer['count']}")
+
+        return "\n".join(lines) + "\n"
+
+def start_metrics_log(registry, path=METRICS_LOG_PATH, interval=METRICS_LOG_INTERVAL,
+                      max_bytes=1_000_000, backups=3):
+    """
+    Periodically appends registry snapshots as JSON lines to a rotating log file.
+
+    Returns:
+        threading.Event: Set it to stop logging, or None if logging is disabled
+    """
+    if not registry.enabled or not path:
+        return None
+
+    logger = logging.getLogger("shortify.metrics")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups))
+
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            logger.info(json.dumps({"time": time.time(), **registry.snapshot()}))
+        logger.info(json.dumps({"time": time.time(), **registry.snapshot()}))
+
+    threading.Thread(target=run, name="metrics-log", daemon=True).start()
+    return stop
+
+metrics = Metrics()
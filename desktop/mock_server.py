@@ -0,0 +1,175 @@
+"""
+Local stand-in for the OpenAI chat-completions API, for benchmarks and offline testing.
+
+Usage:
+    python mock_server.py [--port 8089] [--latency-ms 300] [--tokens-per-second 80] [--error-rate 0.0]
+
+Point the desktop client at it with OPENAI_BASE_URL=http://127.0.0.1:8089/v1.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "the report finds that demand grew steadily while costs fell and the team "
+    "recommends expanding the program to new regions over the next two years"
+).split()
+
+class MockSettings:
+    """Behavior knobs shared by every request the server handles."""
+
+    def __init__(self, latency_ms=300, tokens_per_second=80, error_rate=0.0,
+                 completion_tokens=120, seed=0):
+        self.latency = latency_ms / 1000.0
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.completion_tokens = completion_tokens
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def roll_error(self):
+        with self.lock:
+            self.requests += 1
+            return self.random.random() < self.error_rate
+
+def make_completion_text(settings, max_tokens):
+    count = min(settings.completion_tokens, max_tokens or settings.completion_tokens)
+    return " ".join(WORDS[i % len(WORDS)] for i in range(count)).capitalize() + "."
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+    settings = None
+
+    def setup(self):
+        super().setup()
+        with self.settings.lock:
+            self.settings.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            settings = self.settings
+            self._send_json(200, {"requests": settings.requests, "connections": settings.connections})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        settings = self.settings
+        time.sleep(settings.latency)
+        if settings.roll_error():
+            status = settings.random.choice([429, 500])
+            headers = {"Retry-After": "0.1"} if status == 429 else None
+            self._send_json(status, {"error": {"message": "injected failure", "type": "mock"}}, headers)
+            return
+
+        text = make_completion_text(settings, request.get("max_tokens"))
+        if request.get("stream"):
+            self._stream(request, text)
+        else:
+            self._send_json(200, {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(text.split()), "total_tokens": 0},
+            })
+
+    def _stream(self, request, text):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        delay = 1.0 / self.settings.tokens_per_second if self.settings.tokens_per_second else 0
+        for index, word in enumerate(text.split(" ")):
+            chunk = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": word if index == 0 else " " + word},
+                    "finish_reason": None,
+                }],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+            if delay:
+                time.sleep(delay)
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data):
+        payload = data.encode("utf-8")
+        self.wfile.write(f"{len(payload):x}\r\n".encode("ascii") + payload + b"\r\n")
+        self.wfile.flush()
+
+def start_mock_server(port=0, **settings):
+    """
+    Starts the mock server on a background thread.
+
+    Args:
+        port (int): Port to bind on 127.0.0.1; 0 picks a free one
+        **settings: Passed to MockSettings
+
+    Returns:
+        tuple: (server, base URL ending in /v1)
+    """
+    handler = type("BoundMockHandler", (MockHandler,), {"settings": MockSettings(**settings)})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI chat-completions server.")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-second", type=float, default=80)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server, url = start_mock_server(
+        args.port,
+        latency_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    print(f"Mock server listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
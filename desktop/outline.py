@@ -0,0 +1,360 @@
+import ast
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from prompts import count_tokens
+from metrics import metrics
+from config import CODE_OUTLINE_MIN_TOKENS, CODE_TOKEN_BUDGET, CODE_OUTLINE_CACHE_SIZE
+
+MAX_CALLS = 8  # callees listed per function; the rest rarely change the explanation
+
+BRACE_LANGUAGES = (
+    "javascript", "typescript", "java", "c++", "c#", "go", "php", "swift", "rust", "kotlin",
+)
+
+# Comments and string literals are consumed whole, so braces inside them do not count
+BRACE_TOKEN = re.compile(
+    r'(?P<comment>//[^\n]*|/\*.*?\*/)'
+    r'|(?P<string>"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`(?:\\.|[^`\\])*`)'
+    r'|(?P<brace>[{}])'
+    r'|(?P<newline>\n)'
+    r'|(?P<other>[^\n{}/"\'`]+|/)',
+    re.DOTALL,
+)
+IMPORT_LINE = re.compile(r"^\s*(import|from|using|package|use|require|include|#include|#import)\b|\brequire\(")
+CALL = re.compile(r"\b([A-Za-z_][\w.]*)\s*\(")
+NOT_CALLS = {
+    "if", "for", "while", "switch", "catch", "return", "function", "func", "fn", "fun",
+    "sizeof", "typeof", "new", "super", "this", "match", "when", "elif", "def",
+}
+
+CONTAINER = re.compile(r"\b(class|interface|struct|enum|trait|impl|namespace|object|extension|protocol)\b")
+RUBY_HEADER = re.compile(r"^\s*(class|module|def)\b")
+
+def _first_paragraph(doc):
+    return doc.strip().split("\n\n")[0].strip() if doc else None
+
+def _calls_in(body_text):
+    seen = []
+    for name in CALL.findall(body_text):
+        if name.split(".")[-1] not in NOT_CALLS and name not in seen:
+            seen.append(name)
+    return seen[:MAX_CALLS]
+
+class _PythonOutline(ast.NodeVisitor):
+    """Renders a module as its imports, signatures, docstrings and callees."""
+
+    def __init__(self, source):
+        self.source = source
+        self.lines = []
+        self.depth = 0
+
+    def emit(self, text):
+        self.lines.append("    " * self.depth + text)
+
+    def segment(self, node):
+        return ast.get_source_segment(self.source, node) if node is not None else None
+
+    def arguments(self, args):
+        parts = []
+        positional = args.posonlyargs + args.args
+        defaults = [None] * (len(positional) - len(args.defaults)) + args.defaults
+        for index, (arg, default) in enumerate(zip(positional, defaults)):
+            parts.append(self.argument(arg, default))
+            if args.posonlyargs and index == len(args.posonlyargs) - 1:
+                parts.append("/")
+        if args.vararg:
+            parts.append("*" + self.argument(args.vararg))
+        elif args.kwonlyargs:
+            parts.append("*")
+        for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+            parts.append(self.argument(arg, default))
+        if args.kwarg:
+            parts.append("**" + self.argument(args.kwarg))
+        return ", ".join(parts)
+
+    def argument(self, arg, default=None):
+        text = arg.arg
+        if arg.annotation is not None:
+            text += f": {self.segment(arg.annotation)}"
+        if default is not None:
+            text += f"={self.segment(default)}"
+        return text
+
+    def docstring(self, node):
+        doc = _first_paragraph(ast.get_docstring(node))
+        if doc:
+            self.depth += 1
+            self.emit('"""' + doc + '"""')
+            self.depth -= 1
+
+    def visit_Module(self, node):
+        self.docstring(node)
+        for child in node.body:
+            self.visit(child)
+
+    def visit_Import(self, node):
+        if self.depth == 0:
+            self.emit(self.segment(node))
+
+    visit_ImportFrom = visit_Import
+
+    def visit_Assign(self, node):
+        if self.depth <= 1:
+            names = ", ".join(self.segment(target) for target in node.targets)
+            self.emit(f"{names} = ...")
+
+    def visit_AnnAssign(self, node):
+        if self.depth <= 1:
+            self.emit(f"{self.segment(node.target)}: {self.segment(node.annotation)}")
+
+    def visit_ClassDef(self, node):
+        for decorator in node.decorator_list:
+            self.emit("@" + self.segment(decorator))
+        bases = [self.segment(base) for base in node.bases]
+        bases += [f"{keyword.arg}={self.segment(keyword.value)}" for keyword in node.keywords if keyword.arg]
+        self.emit(f"class {node.name}({', '.join(bases)}):" if bases else f"class {node.name}:")
+        self.docstring(node)
+        self.depth += 1
+        for child in node.body:
+            self.visit(child)
+        self.depth -= 1
+
+    def visit_FunctionDef(self, node, prefix="def"):
+        for decorator in node.decorator_list:
+            self.emit("@" + self.segment(decorator))
+        returns = f" -> {self.segment(node.returns)}" if node.returns is not None else ""
+        self.emit(f"{prefix} {node.name}({self.arguments(node.args)}){returns}: ...")
+        self.docstring(node)
+        calls = []
+        for child in ast.walk(node):
+            if isinstance(child, ast.Call):
+                name = self.segment(child.func)
+                if name and "(" not in name and name not in calls:
+                    calls.append(name)
+        if calls:
+            self.depth += 1
+            self.emit("# calls: " + ", ".join(calls[:MAX_CALLS]))
+            self.depth -= 1
+
+    def visit_AsyncFunctionDef(self, node):
+        self.visit_FunctionDef(node, prefix="async def")
+
+    def generic_visit(self, node):
+        # Module-level statements other than definitions are behaviour, not structure
+        pass
+
+def outline_python(code):
+    """Outline Python source with the ast module; raises SyntaxError if it does not parse."""
+    outline = _PythonOutline(code)
+    outline.visit(ast.parse(code))
+    return "\n".join(outline.lines)
+
+def outline_braced(code):
+    """
+    Outlines a C-family language by tracking brace depth.
+
+    Imports (including braces or parentheses they span), the headers of
+    types and of the functions declared at the top level or inside a
+    type, the member declarations of types and the doc comment above each
+    header are kept. Function bodies are replaced by the calls they make.
+    """
+    lines = []
+    line = []
+    comment = None
+    pending = ""  # last structural line; the header when the brace sits on its own line
+    pending_index = None  # where pending was kept as a member line, if it was
+    import_braces = 0  # braces opened by the import being read, e.g. import { a, b } from "x"
+    blocks = []  # one per open brace: header line index (or None), whether it is a type, body text
+
+    def flush():
+        text = "".join(line).strip()
+        line.clear()
+        return text
+
+    for match in BRACE_TOKEN.finditer(code):
+        kind, value = match.lastgroup, match.group()
+        structural = not blocks or blocks[-1]["container"]
+        if kind == "comment":
+            if structural and value.startswith(("/**", "///")):
+                comment = value.split("\n")[0].strip()
+            continue
+        body = next((block["body"] for block in reversed(blocks) if block["body"] is not None), None)
+        if body is not None:
+            body.append(value)
+        in_import = structural and IMPORT_LINE.search("".join(line))
+
+        if kind == "newline":
+            text = "".join(line)
+            if in_import and (import_braces or text.count("(") > text.count(")")):
+                line.append(" ")  # the import continues on the next line
+                continue
+            text = flush()
+            if not text or not structural:
+                continue
+            pending, pending_index = text, None
+            if in_import:
+                lines.append("    " * len(blocks) + " ".join(text.split()))
+                pending = ""
+            elif blocks:
+                # Inside a type every line is a member: a field, or a method header
+                lines.append("    " * len(blocks) + text)
+                pending_index = len(lines) - 1
+        elif value == "{" and in_import:
+            import_braces += 1
+            line.append(value)
+        elif value == "}" and import_braces:
+            import_braces -= 1
+            line.append(value)
+        elif value == "{":
+            header = flush()
+            if not header and pending:
+                header = pending
+                if pending_index is not None and pending_index == len(lines) - 1:
+                    lines.pop()  # re-emitted below as the header of this block
+            pending, pending_index = "", None
+            if structural and header:
+                if comment:
+                    lines.append("    " * len(blocks) + comment)
+                lines.append("    " * len(blocks) + header + " {")
+                container = bool(CONTAINER.search(header))
+                blocks.append({"index": len(lines) - 1, "container": container, "body": None if container else []})
+            else:
+                blocks.append({"index": None, "container": False, "body": None})
+            comment = None
+        elif value == "}":
+            flush()
+            pending, pending_index = "", None
+            if not blocks:
+                continue
+            block = blocks.pop()
+            if block["index"] is None:
+                continue
+            calls = _calls_in("".join(block["body"] or []))
+            if calls:
+                lines[block["index"]] += f" /* calls: {', '.join(calls)} */"
+            if block["index"] == len(lines) - 1:
+                lines[-1] += " }"
+            else:
+                lines.append("    " * len(blocks) + "}")
+        else:
+            line.append(value)
+    return "\n".join(lines)
+
+def outline_ruby(code):
+    """Outline Ruby by keeping require, class, module and def lines, with the calls under each def."""
+    lines = []
+    current = None  # (index of the def line, its body lines)
+
+    def finish():
+        if current is not None:
+            calls = _calls_in("\n".join(current[1]))
+            if calls:
+                lines[current[0]] += f"  # calls: {', '.join(calls)}"
+
+    for raw in code.splitlines():
+        text = raw.split("#", 1)[0].rstrip()
+        if not text.strip():
+            continue
+        if RUBY_HEADER.match(text) or IMPORT_LINE.search(text):
+            finish()
+            lines.append(text)
+            current = (len(lines) - 1, []) if text.lstrip().startswith("def") else None
+        elif current is not None:
+            current[1].append(text)
+    finish()
+    return "\n".join(lines)
+
+def _outline(code, language):
+    if language == "python":
+        return outline_python(code)
+    if language in BRACE_LANGUAGES:
+        return outline_braced(code)
+    if language == "ruby":
+        return outline_ruby(code)
+    if language is None:
+        # Auto-detect: Python if it parses, a brace language if it has blocks
+        try:
+            return outline_python(code)
+        except SyntaxError:
+            pass
+        if "{" in code:
+            return outline_braced(code)
+    return None  # SQL and anything unrecognised are sent as written
+
+def _fit(text, budget):
+    """Drop trailing lines until text fits the token budget."""
+    if count_tokens(text) <= budget:
+        return text
+    kept = []
+    used = count_tokens("# ... (truncated)")
+    for line in text.split("\n"):
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept + ["# ... (truncated)"])
+
+class CodeOutliner:
+    """
+    Shrinks source code to the structure a code summary needs.
+
+    Inputs under min_tokens are returned unchanged: for a snippet the
+    bodies are the point. Larger inputs are reduced to imports,
+    signatures, docstrings and per-function callees, trimmed to budget
+    tokens. Outlines are cached by a hash of the source, and the raw code
+    is returned whenever parsing fails or the outline would not be smaller.
+    """
+
+    def __init__(self, min_tokens=CODE_OUTLINE_MIN_TOKENS, budget=CODE_TOKEN_BUDGET,
+                 max_entries=CODE_OUTLINE_CACHE_SIZE):
+        self.min_tokens = min_tokens
+        self.budget = budget
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compact(self, code, language=None):
+        """
+        Returns the text to send in place of code.
+
+        Args:
+            code (str): Source code as selected
+            language (str): Language from the settings panel, or None to auto-detect
+
+        Returns:
+            str: An outline of code, or code itself
+        """
+        raw_tokens = count_tokens(code)
+        if raw_tokens <= self.min_tokens:
+            return code
+
+        key = hashlib.sha256(f"{language}\0{self.budget}\0{code}".encode("utf-8")).hexdigest()
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                metrics.inc("code_outline", result="cached")
+                return self._entries[key]
+
+        with metrics.span("code_outline_build", language=language or "auto"):
+            try:
+                outline = _outline(code, language)
+            except (SyntaxError, ValueError, RecursionError):
+                outline = None
+        if outline and count_tokens(outline) < raw_tokens:
+            result = _fit(outline, self.budget)
+            metrics.inc("code_outline", result="outlined")
+            metrics.inc("code_outline_tokens_saved", raw_tokens - count_tokens(result))
+        else:
+            result = code
+            metrics.inc("code_outline", result="raw")
+
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+code_outliner = CodeOutliner()
@@ -0,0 +1,142 @@
+import math
+import re
+from functools import lru_cache
+
+STYLE_INSTRUCTIONS = {
+    "default": "",
+    "academic": " Use a formal, academic tone.",
+    "casual": " Use a relaxed, conversational tone.",
+    "business": " Use a clear, professional business tone.",
+    "creative": " Use a vivid, engaging tone.",
+}
+
+USER_PREFIXES = {
+    "summarize": "Summarize the following text:\n\n",
+    "paraphrase": "Paraphrase the following text:\n\n",
+    "code_summarize": "Summarize the following code:\n\n",
+}
+
+TOKENS_PER_WORD = 1.35  # English prose through a BPE tokenizer
+OUTPUT_HEADROOM = 1.25  # room for the model to overshoot the word range slightly
+MIN_OUTPUT_TOKENS = 64
+MAX_OUTPUT_TOKENS = 1024
+SECTION_OUTPUT_TOKENS = 300
+
+# Word pieces and single punctuation marks roughly track BPE token boundaries
+TOKEN_PIECE = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+TRAILING_SPACE = re.compile(r"[ \t]+$", re.MULTILINE)
+LEADING_SPACE = re.compile(r"^[ \t]+", re.MULTILINE)
+INLINE_SPACE = re.compile(r"(?<=\S)[ \t]{2,}")
+BLANK_LINES = re.compile(r"\n{3,}")
+
+class Prompt:
+    """A ready-to-send request: messages plus the token budget they need."""
+
+    def __init__(self, system, user, max_tokens, input_tokens):
+        self.system = system
+        self.user = user
+        self.max_tokens = max_tokens
+        self.input_tokens = input_tokens
+
+    @property
+    def total_tokens(self):
+        return self.input_tokens + self.max_tokens
+
+def count_tokens(text):
+    """
+    Estimates the token count of text without a tokenizer model.
+
+    Long words are counted as one token per four letters, which tracks
+    BPE vocabularies closely enough for budgeting.
+    """
+    count = 0
+    for piece in TOKEN_PIECE.findall(text):
+        count += math.ceil(len(piece) / 4) if piece.isalpha() else 1
+    return count
+
+def compact_whitespace(text, preserve_indentation=False):
+    """
+    Removes whitespace that costs tokens but carries no meaning.
+
+    Trailing spaces are dropped and runs of blank lines collapse to one.
+    In prose, indentation is dropped and runs of spaces inside a line
+    collapse too; code keeps its indentation.
+    """
+    text = TRAILING_SPACE.sub("", text.replace("\r\n", "\n"))
+    text = BLANK_LINES.sub("\n\n", text)
+    if not preserve_indentation:
+        text = INLINE_SPACE.sub(" ", LEADING_SPACE.sub("", text))
+    return text.strip()
+
+def output_budget(max_words):
+    """Completion tokens needed for a result of up to max_words words."""
+    tokens = math.ceil(max_words * TOKENS_PER_WORD * OUTPUT_HEADROOM)
+    return max(MIN_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, tokens))
+
+def _style_hint(style):
+    return STYLE_INSTRUCTIONS.get(style or "default", "")
+
+@lru_cache(maxsize=256)
+def system_prompt(action, max_length, min_length, style, language):
+    """Return the system prompt for an action and its precomputed token count."""
+    if action == "summarize":
+        text = (
+            f"Provide a concise summary between {min_length}-{max_length} words. "
+            f"Capture the key points and main ideas.{_style_hint(style)}"
+        )
+    elif action == "paraphrase":
+        text = (
+            f"Rewrite the text in your own words using {min_length}-{max_length} words. "
+            f"Preserve the original meaning.{_style_hint(style)}"
+        )
+    elif action == "code_summarize":
+        language_hint = f"The code is written in {language}. " if language else ""
+        text = (
+            f"You are a senior software engineer. {language_hint}"
+            f"Explain what the code does in at most {max_length} words, "
+            f"covering its purpose, main components and notable behavior."
+        )
+    elif action == "section":
+        text = (
+            "Summarize this section of a longer document. Keep every key fact, "
+            "name and figure; omit filler."
+        )
+    elif action == "merge":
+        text = (
+            f"Combine the partial summaries of one document into a single coherent summary "
+            f"between {min_length}-{max_length} words.{_style_hint(style)}"
+        )
+    else:
+        raise ValueError(f"Unknown action: {action}")
+    return text, count_tokens(text)
+
+@lru_cache(maxsize=None)
+def _prefix_tokens(prefix):
+    return count_tokens(prefix)
+
+def build_prompt(action, text, max_length=150, min_length=100, style="default", language=None):
+    """
+    Builds the smallest request that can carry an action.
+
+    Args:
+        action (str): "summarize", "paraphrase", "code_summarize", "section" or "merge"
+        text (str): Input text
+        max_length (int): Maximum result length in words
+        min_length (int): Minimum result length in words
+        style (str): Writing style
+        language (str): Programming language for code summaries
+
+    Returns:
+        Prompt: Messages with max_tokens sized from the requested word range
+    """
+    system, system_tokens = system_prompt(action, max_length, min_length, style or "default", language)
+    body = compact_whitespace(text, preserve_indentation=(action == "code_summarize"))
+    prefix = USER_PREFIXES.get(action, "")
+
+    if action == "section":
+        max_tokens = SECTION_OUTPUT_TOKENS
+    else:
+        max_tokens = output_budget(max_length)
+
+    input_tokens = system_tokens + _prefix_tokens(prefix) + count_tokens(body)
+    return Prompt(system, prefix + body, max_tokens, input_tokens)
@@ -0,0 +1,183 @@
+import email.utils
+import random
+import threading
+import time
+import openai
+from metrics import metrics
+from config import (
+    RATE_LIMIT_RPM,
+    RATE_LIMIT_TPM,
+    MAX_CONCURRENCY,
+    MAX_RETRIES,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+)
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount=1):
+        """Block until amount tokens are available, then take them."""
+        # A request larger than the bucket could never fit; let it through once the bucket is full
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def drain(self):
+        """Empty the bucket, e.g. after the provider reports throttling."""
+        with self._lock:
+            self._refill()
+            self._tokens = 0
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: grows by one slot per window of successes and
+    halves whenever the backend throttles or fails.
+    """
+
+    def __init__(self, max_limit=MAX_CONCURRENCY, min_limit=1, initial=None):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(initial if initial is not None else max(min_limit, max_limit // 2))
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def on_success(self):
+        with self._cond:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            self.limit = max(self.min_limit, self.limit / 2)
+
+def is_retryable(error):
+    """True for throttling, server errors and dropped connections."""
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status in RETRYABLE_STATUS or status >= 500)
+
+def retry_after(error):
+    """Seconds the server asked us to wait, from Retry-After headers, or None."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None  # a malformed header must not hide the API error behind it
+    return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+def backoff_delay(attempt, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class BackendLimiter:
+    """
+    Shared gate for every model call: request and token buckets, an adaptive
+    concurrency limit, and jittered retries that honor Retry-After.
+    """
+
+    def __init__(self, requests_per_minute=RATE_LIMIT_RPM, tokens_per_minute=RATE_LIMIT_TPM,
+                 max_concurrency=MAX_CONCURRENCY, max_retries=MAX_RETRIES):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.max_retries = max_retries
+        self.throttled = 0
+        self.retries = 0
+        self._lock = threading.Lock()  # guards the counters, which every worker thread updates
+
+    def call(self, fn, tokens=0):
+        """
+        Runs fn under the rate and concurrency limits, retrying transient failures.
+
+        Args:
+            fn (callable): Performs one backend request
+            tokens (int): Estimated tokens the request consumes (prompt plus completion)
+
+        Returns:
+            The value returned by fn
+        """
+        attempt = 0
+        while True:
+            self.requests.acquire()
+            if tokens:
+                self.tokens.acquire(tokens)
+
+            with self.concurrency:
+                try:
+                    result = fn()
+                except Exception as e:
+                    if not is_retryable(e) or attempt >= self.max_retries:
+                        raise
+                    error = e
+                else:
+                    self.concurrency.on_success()
+                    return result
+
+            self.concurrency.on_throttle()
+            metrics.inc("backend_retries", status=getattr(error, "status_code", "connection"))
+            throttled = getattr(error, "status_code", None) == 429
+            if throttled:
+                self.requests.drain()
+            with self._lock:
+                if throttled:
+                    self.throttled += 1
+                self.retries += 1
+            delay = retry_after(error)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            attempt += 1
+            time.sleep(delay)
+
+backend_limiter = BackendLimiter()
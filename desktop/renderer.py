@@ -0,0 +1,94 @@
+import re
+import time
+from collections import deque
+from metrics import metrics
+
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+class BatchedTextRenderer:
+    """
+    Inserts text into a Tk Text widget in word batches, one batch per frame.
+
+    Instead of one after() callback and one insert per character, pending
+    words are collected and written with a single insert per frame. The
+    batch size adapts so each frame stays within its time budget, and
+    outputs longer than instant_threshold characters skip the animation.
+    """
+
+    def __init__(self, widget, frame_ms=16, budget_ms=4.0, instant_threshold=2000,
+                 initial_batch=4, max_batch=32):
+        self.widget = widget
+        self.frame_ms = frame_ms
+        self.budget = budget_ms / 1000.0
+        self.instant_threshold = instant_threshold
+        self.batch_size = initial_batch
+        self.max_batch = max_batch
+        self.callbacks = 0
+        self._pending = deque()
+        self._pending_chars = 0
+        self._scheduled = None
+
+    def write(self, text, instant=False):
+        """
+        Queues text for rendering.
+
+        Args:
+            text (str): Text to append
+            instant (bool): Insert everything pending right away
+        """
+        for token in TOKEN_PATTERN.findall(text):
+            self._pending.append(token)
+        self._pending_chars += len(text)
+
+        if instant or self._pending_chars >= self.instant_threshold:
+            self.flush()
+        elif self._scheduled is None and self._pending:
+            self._scheduled = self.widget.after(self.frame_ms, self._frame)
+
+    def flush(self):
+        """Insert all pending text immediately."""
+        self._cancel_frame()
+        if self._pending:
+            self._insert("".join(self._pending))
+            self._pending.clear()
+            self._pending_chars = 0
+
+    def clear(self):
+        """Drop pending text without inserting it."""
+        self._cancel_frame()
+        self._pending.clear()
+        self._pending_chars = 0
+
+    def is_idle(self):
+        return not self._pending
+
+    def _cancel_frame(self):
+        if self._scheduled is not None:
+            self.widget.after_cancel(self._scheduled)
+            self._scheduled = None
+
+    def _frame(self):
+        self._scheduled = None
+        self.callbacks += 1
+
+        count = min(self.batch_size, len(self._pending))
+        batch = "".join(self._pending.popleft() for _ in range(count))
+        self._pending_chars -= len(batch)
+
+        started = time.perf_counter()
+        self._insert(batch)
+        elapsed = time.perf_counter() - started
+        metrics.observe("render_frame", elapsed)
+
+        # Grow batches while frames are cheap, shrink them when over budget
+        if elapsed < self.budget / 2:
+            self.batch_size = min(self.max_batch, self.batch_size * 2)
+        elif elapsed > self.budget:
+            self.batch_size = max(1, self.batch_size // 2)
+
+        if self._pending:
+            self._scheduled = self.widget.after(self.frame_ms, self._frame)
+
+    def _insert(self, text):
+        self.widget.insert("end", text)
+        self.widget.see("end")
@@ -0,0 +1,130 @@
+import re
+import threading
+import zlib
+from collections import OrderedDict
+import numpy as np
+from metrics import metrics
+from config import SIMILARITY_THRESHOLD, SIMILARITY_MAX_ENTRIES
+
+WORD = re.compile(r"[a-z0-9']+")
+
+SHINGLE_WORDS = 3
+NUM_HASHES = 64
+BANDS = 16  # 16 bands of 4 rows: near-certain candidates at 0.85 Jaccard, rare below 0.5
+ROWS = NUM_HASHES // BANDS
+PRIME = (1 << 32) - 5  # a * x + b stays below 2**64 for 32-bit a, b and x
+
+_random = np.random.RandomState(1)
+_A = _random.randint(1, PRIME, size=NUM_HASHES, dtype=np.uint64)
+_B = _random.randint(0, PRIME, size=NUM_HASHES, dtype=np.uint64)
+
+def shingles(text, size=SHINGLE_WORDS):
+    """Return the hashed word n-grams of text, ignoring case, punctuation and spacing."""
+    words = WORD.findall(text.lower())
+    if len(words) < size:
+        words = words + [""] * (size - len(words))
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+def minhash(text):
+    """
+    Computes the MinHash signature of text's shingle set.
+
+    Returns:
+        numpy.ndarray: NUM_HASHES uint32 values; the fraction of positions
+        two signatures share estimates the Jaccard similarity of the texts
+    """
+    values = np.fromiter(shingles(text), dtype=np.uint64)
+    hashed = (_A[:, None] * values[None, :] + _B[:, None]) % PRIME
+    return hashed.min(axis=1).astype(np.uint32)
+
+def estimated_similarity(a, b):
+    return float(np.count_nonzero(a == b)) / len(a)
+
+class SimilarityIndex:
+    """
+    Finds previously summarized inputs that are nearly identical to a new one.
+
+    Signatures are split into bands and each band is hashed into a bucket,
+    so a lookup only compares against entries that share at least one
+    bucket instead of scanning the whole index. Entries are partitioned by
+    a scope string (backend, model and request settings); summaries are
+    never reused across different settings.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, max_entries=SIMILARITY_MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # id -> (signature, bucket keys, value)
+        self._buckets = {}  # bucket key -> set of ids
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _bucket_keys(self, scope, signature):
+        return [hash((scope, band, signature[band * ROWS:(band + 1) * ROWS].tobytes())) for band in range(BANDS)]
+
+    def lookup(self, scope, text):
+        """
+        Returns the value stored for the most similar input within the threshold.
+
+        Args:
+            scope (str): Settings the value must have been produced with
+            text (str): New input
+
+        Returns:
+            str: Stored value, or None if nothing is similar enough
+        """
+        signature = minhash(text)
+        with self._lock:
+            candidates = set()
+            for key in self._bucket_keys(scope, signature):
+                candidates.update(self._buckets.get(key, ()))
+
+            best, best_similarity = None, self.threshold
+            for entry_id in candidates:
+                similarity = estimated_similarity(signature, self._entries[entry_id][0])
+                if similarity >= best_similarity:
+                    best, best_similarity = entry_id, similarity
+
+            if best is None:
+                self.misses += 1
+                metrics.inc("similarity_lookups", result="miss")
+                return None
+            self._entries.move_to_end(best)
+            self.hits += 1
+            metrics.inc("similarity_lookups", result="hit")
+            return self._entries[best][2]
+
+    def add(self, scope, text, value):
+        """Index value under the signature of text."""
+        signature = minhash(text)
+        keys = self._bucket_keys(scope, signature)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (signature, keys, value)
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        entry_id, (_, keys, _) = self._entries.popitem(last=False)
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+similar_summaries = SimilarityIndex()
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from metrics import metrics
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key across threads.
+
+    The first caller for a key runs the function; callers that arrive
+    while it is in flight block on the same result. Exceptions, including
+    BaseExceptions such as KeyboardInterrupt, are re-raised in every caller.
+    """
+
+    def __init__(self, name="default"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """
+        Runs fn() once per key at a time.
+
+        Args:
+            key (str): Identity of the call, e.g. a cache key
+            fn (callable): Zero-argument function computing the result
+
+        Returns:
+            The result of the in-flight call for key
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            metrics.inc("coalesced_requests", group=self.name)
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+class _AsyncCall:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent awaits for the same key on one event loop.
+
+    The shared call runs as its own task, so cancelling one waiter does not
+    cancel the others; the task is cancelled only when every waiter has
+    gone. If the task itself is cancelled or fails, every waiter sees it.
+    """
+
+    def __init__(self, name="default"):
+        self.name = name
+        self._calls = {}
+        self.coalesced = 0
+
+    async def do(self, key, make_awaitable):
+        """
+        Awaits make_awaitable() once per key at a time.
+
+        Args:
+            key (str): Identity of the call, e.g. a cache key
+            make_awaitable (callable): Returns a coroutine or future computing the result
+
+        Returns:
+            The result of the in-flight call for key
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _AsyncCall(asyncio.ensure_future(make_awaitable()))
+            call.task.add_done_callback(lambda task: self._forget(key, call))
+        else:
+            self.coalesced += 1
+            metrics.inc("coalesced_requests", group=self.name)
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                # The done callback runs on a later loop iteration; a caller arriving
+                # before then must start a new call, not join the cancelled one
+                self._forget(key, call)
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def in_flight(self):
+        return len(self._calls)
@@ -0,0 +1,47 @@
+class SpriteCache:
+    """
+    Scaled copies of one image, rendered once and reused for every frame.
+
+    Scales are quantized to `steps` sizes between min_scale and max_scale,
+    so an animation only ever shows a handful of distinct frames. The
+    frames are built with PIL the first time one is asked for (by then
+    warmup.py has usually imported it) and must be used on the Tk thread.
+    """
+
+    def __init__(self, path, size=100, min_scale=1.0, max_scale=1.1, steps=6):
+        self.path = path
+        self.size = size
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.steps = steps
+        self._frames = None
+
+    def _index(self, scale):
+        position = (scale - self.min_scale) / (self.max_scale - self.min_scale)
+        return int(round(min(1.0, max(0.0, position)) * (self.steps - 1)))
+
+    def _scale(self, index):
+        return self.min_scale + index / (self.steps - 1) * (self.max_scale - self.min_scale)
+
+    def quantize(self, scale):
+        """Return the scale of the cached frame closest to scale."""
+        return self._scale(self._index(scale))
+
+    def _build(self):
+        from PIL import Image, ImageTk  # deferred to keep startup fast; usually preloaded by warmup.py
+        source = Image.open(self.path).convert("RGBA")
+        # One large reduction up front; each frame is then resampled from a small image
+        largest = int(round(self.size * self.max_scale))
+        source.thumbnail((largest * 2, largest * 2), Image.LANCZOS)
+
+        frames = []
+        for step in range(self.steps):
+            side = int(round(self.size * self._scale(step)))
+            frames.append(ImageTk.PhotoImage(source.resize((side, side), Image.LANCZOS)))
+        return frames
+
+    def frame(self, scale):
+        """Return the PhotoImage for scale, rendering all frames on first use."""
+        if self._frames is None:
+            self._frames = self._build()
+        return self._frames[self._index(scale)]
@@ -1,51 +1,258 @@
-import openai
+import threading
+import time
 import traceback
-from config import API_KEY
+from cache import summary_cache, make_key
+from backends import router
+from metrics import metrics
+from singleflight import SingleFlight
+from similarity import similar_summaries
+from config import SIMILARITY_ENABLED
 
 class SummarizerError(Exception):
     """Custom exception for summarization errors."""
     pass
 
-def summarize_text(text, max_length=150, min_length=100):
+# Identical requests already in flight share one backend call
+in_flight = SingleFlight("summarizer")
+
+# Whether the last run_action on each thread was answered without a backend call
+_last_call = threading.local()
+
+ERROR_PREFIXES = {
+    "summarize": "Summarization Error",
+    "paraphrase": "Paraphrase Error",
+    "code_summarize": "Code Summary Error",
+}
+
+def _validate_input(action, text):
+    with metrics.span("validation", action=action, stage="input"):
+        _check_input(action, text)
+
+def _check_input(action, text):
+    if action == "summarize":
+        if not text or len(text.strip()) < 50:
+            raise SummarizerError("Text is too short to summarize.")
+    elif action == "paraphrase":
+        if not text or not text.strip():
+            raise SummarizerError("Text is empty.")
+    elif action == "code_summarize":
+        if not text or not text.strip():
+            raise SummarizerError("No code to summarize.")
+    else:
+        raise SummarizerError(f"Unknown action: {action}")
+
+def _cache_key(backend, action, text, max_length, min_length, style, language):
+    if action == "code_summarize":
+        return make_key(text, action=action, backend=backend.name, model=backend.model,
+                        language=language, max_length=max_length)
+    return make_key(text, action=action, backend=backend.name, model=backend.model,
+                    style=style, min_length=min_length, max_length=max_length)
+
+def _similarity_scope(backend, action, text, max_length, min_length, style):
+    # Near-duplicate reuse applies to remote summaries only: paraphrases must
+    # follow their exact input, and local summaries are cheap to recompute
+    if not SIMILARITY_ENABLED or action != "summarize" or backend is not router.remote:
+        return None
+    # An edited long document would match its previous version; incremental
+    # sections already recompute just the edit, and keep the summary exact
+    if backend.incremental and backend._is_long(action, text):
+        return None
+    return f"{backend.name}|{backend.model}|{action}|{style}|{min_length}|{max_length}"
+
+def _validate_result(backend, action, result, min_length):
+    with metrics.span("validation", action=action, stage="result"):
+        # Additional validation; extractive output is taken verbatim from the input
+        if backend is router.remote and action == "summarize" and len(result) < min_length:
+            raise SummarizerError("Generated summary is too short.")
+
+def _run_on(backend, action, text, max_length, min_length, style, language):
+    """
+    Serve a request from the cache, or from the given backend on a miss.
+
+    Concurrent misses for the same key are coalesced into one backend call,
+    and a summary of a nearly identical earlier input is reused if there is one.
+    """
+    scope = _similarity_scope(backend, action, text, max_length, min_length, style)
+
+    def compute():
+        if scope is not None:
+            similar = similar_summaries.lookup(scope, text)
+            if similar is not None:
+                return similar
+        _last_call.cached = False
+        result = backend.run(action, text, max_length, min_length, style, language)
+        _validate_result(backend, action, result, min_length)
+        if scope is not None:
+            similar_summaries.add(scope, text, result)
+        return result
+
+    key = _cache_key(backend, action, text, max_length, min_length, style, language)
+    return in_flight.do(key, lambda: summary_cache.get_or_compute(key, compute))
+
+def run_action(action, text, max_length=150, min_length=100, style="default", language=None):
+    """
+    Produces the result for any action, raising instead of returning an error message.
+
+    Args:
+        action (str): "summarize", "paraphrase" or "code_summarize"
+        text (str): Selected text or code
+        max_length (int): Maximum result length
+        min_length (int): Minimum result length
+        style (str): Writing style
+        language (str): Programming language for code summaries
+
+    Returns:
+        str: Result text
+
+    Raises:
+        SummarizerError: If the input or the generated result is invalid
+    """
+    _last_call.cached = True
+    with metrics.span("summarizer_request", action=action):
+        return _run_action(action, text, max_length, min_length, style, language)
+
+def served_from_cache():
+    """
+    True if the last run_action on this thread returned a stored result.
+
+    Only the result as a whole counts: a long document whose sections were
+    partly cached still needed backend calls, so it is not a hit.
+    """
+    return getattr(_last_call, "cached", False)
+
+def _run_action(action, text, max_length, min_length, style, language):
+    _validate_input(action, text)
+    backend = router.choose(action, text, max_length)
+    try:
+        return _run_on(backend, action, text, max_length, min_length, style, language)
+    except Exception as e:
+        fallback = router.fallback(action, e, text, max_length)
+        if fallback is None or fallback is backend:
+            raise
+        return _run_on(fallback, action, text, max_length, min_length, style, language)
+
+def _error_message(action, error):
+    metrics.inc("summarizer_errors", action=action, kind=type(error).__name__)
+    if isinstance(error, SummarizerError):
+        return f"{ERROR_PREFIXES.get(action, 'Error')}: {str(error)}"
+    traceback.print_exc()
+    return f"Unexpected Error: {str(error)}"
+
+def summarize_text(text, max_length=150, min_length=100, style="default"):
     """
     Summarizes the selected text using the OpenAI API.
-    
+
     Args:
         text (str): Text to summarize
         max_length (int): Maximum summary length
         min_length (int): Minimum summary length
-    
+        style (str): Writing style of the summary
+
     Returns:
         str: Summarized text
     """
     try:
-        # Validate input
-        if not text or len(text.strip()) < 50:
-            raise SummarizerError("Text is too short to summarize.")
+        return run_action("summarize", text, max_length, min_length, style)
+    except Exception as e:
+        return _error_message("summarize", e)
 
-        client = openai.OpenAI(api_key=API_KEY)
-        response = client.chat.completions.create(
-            model="gpt-4.5-preview",
-            messages=[
-                {
-                    "role": "system", 
-                    "content": f"Provide a concise summary between {min_length}-{max_length} words. Capture the key points and main ideas."
-                },
-                {"role": "user", "content": f"Summarize the following text:\n\n{text}"}
-            ],
-            max_tokens=500,
-            temperature=0.7
-        )
-        summary = response.choices[0].message.content.strip()
-        
-        # Additional validation
-        if len(summary) < min_length:
-            raise SummarizerError("Generated summary is too short.")
-        
-        return summary
-    
-    except SummarizerError as e:
-        return f"Summarization Error: {str(e)}"
+def paraphrase_text(text, max_length=150, min_length=100, style="default"):
+    """
+    Paraphrases the selected text using the OpenAI API.
+
+    Args:
+        text (str): Text to paraphrase
+        max_length (int): Maximum paraphrase length
+        min_length (int): Minimum paraphrase length
+        style (str): Writing style of the paraphrase
+
+    Returns:
+        str: Paraphrased text
+    """
+    try:
+        return run_action("paraphrase", text, max_length, min_length, style)
+    except Exception as e:
+        return _error_message("paraphrase", e)
+
+def summarize_code(code, max_length=150, language=None):
+    """
+    Explains what the selected source code does using the OpenAI API.
+
+    Args:
+        code (str): Source code to summarize
+        max_length (int): Maximum summary length
+        language (str): Programming language, or None to auto-detect
+
+    Returns:
+        str: Code summary
+    """
+    try:
+        return run_action("code_summarize", code, max_length, language=language)
+    except Exception as e:
+        return _error_message("code_summarize", e)
+
+def stream_action(action, text, max_length=150, min_length=100, style="default", language=None):
+    """
+    Streams the result of an action piece by piece as the backend produces it.
+
+    Cache hits, local results and long documents (which need a map-reduce
+    pass first) are yielded as a single piece. Errors are yielded as a
+    message, matching the non-streaming entry points.
+
+    Args:
+        action (str): "summarize", "paraphrase" or "code_summarize"
+        text (str): Selected text or code
+        max_length (int): Maximum result length
+        min_length (int): Minimum result length
+        style (str): Writing style
+        language (str): Programming language for code summaries
+
+    Yields:
+        str: Consecutive pieces of the result
+    """
+    try:
+        _validate_input(action, text)
+        backend = router.choose(action, text, max_length)
+        if backend is not router.remote:
+            yield _run_on(backend, action, text, max_length, min_length, style, language)
+            return
+
+        key = _cache_key(backend, action, text, max_length, min_length, style, language)
+        cached = summary_cache.get(key)
+        scope = _similarity_scope(backend, action, text, max_length, min_length, style)
+        if cached is None and scope is not None:
+            cached = similar_summaries.lookup(scope, text)
+            if cached is not None:
+                summary_cache.put(key, cached)
+        if cached is not None:
+            yield cached
+            return
+
+        started = time.perf_counter()
+        pieces = []
+        try:
+            for piece in backend.stream(action, text, max_length, min_length, style, language):
+                if not pieces:
+                    piece = piece.lstrip()
+                pieces.append(piece)
+                yield piece
+        except Exception as e:
+            # Offline before anything was shown: answer locally if possible
+            fallback = router.fallback(action, e, text, max_length)
+            if fallback is None or pieces:
+                raise
+            yield _run_on(fallback, action, text, max_length, min_length, style, language)
+            return
+
+        # Text already shown cannot be retracted, so a result that fails
+        # validation is simply not cached
+        result = "".join(pieces).strip()
+        try:
+            _validate_result(backend, action, result, min_length)
+        except SummarizerError:
+            return
+        summary_cache.put(key, result, time.perf_counter() - started)
+        if scope is not None:
+            similar_summaries.add(scope, text, result)
     except Exception as e:
-        traceback.print_exc()
-        return f"Unexpected Error: {str(e)}"
\ No newline at end of file
+        yield _error_message(action, e)
@@ -0,0 +1,33 @@
+import importlib
+import threading
+import time
+from metrics import metrics
+
+# Loaded off the Tk thread once the window is showing. Code that needs one
+# of these imports it at the point of use, which returns at once if the
+# warm-up got there first or waits on the import lock if it is mid-load.
+HEAVY_MODULES = ("summarizer", "pyperclip", "keyboard", "PIL.ImageTk")
+
+def warm_up(modules=HEAVY_MODULES):
+    """
+    Imports modules one at a time, timing each.
+
+    Returns:
+        dict: Module name to exception for imports that failed; they are
+        raised again where the module is actually used
+    """
+    failures = {}
+    for name in modules:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            failures[name] = e
+        metrics.observe("warmup_import", time.perf_counter() - started, module=name)
+    return failures
+
+def start_warmup(modules=HEAVY_MODULES):
+    """Run warm_up on a daemon thread and return the thread."""
+    thread = threading.Thread(target=warm_up, args=(modules,), name="warmup", daemon=True)
+    thread.start()
+    return thread
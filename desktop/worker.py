@@ -0,0 +1,116 @@
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from config import WORKER_THREADS, WORKER_POLL_MS
+
+class SummaryWorker:
+    """
+    Runs summarizer jobs on a thread pool and hands their output back to the Tk loop.
+
+    Tk widgets may only be touched from the main thread, so worker threads
+    put their output on a queue that the main loop drains with after().
+    Only the most recent job is live: submitting a new one cancels the
+    previous job, and output from cancelled jobs is discarded.
+    """
+
+    def __init__(self, root, max_workers=WORKER_THREADS, poll_ms=WORKER_POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summarizer")
+        self._events = queue.Queue()
+        self._lock = threading.Lock()
+        self._job_id = 0
+        self._cancel_event = None
+        self._callbacks = None
+        self._polling = False
+
+    def submit(self, make_stream, on_piece, on_done=None):
+        """
+        Starts a job, superseding any job still in flight.
+
+        Args:
+            make_stream (callable): Returns an iterable of result pieces; called on the worker thread
+            on_piece (callable): Receives each piece on the Tk thread
+            on_done (callable): Called on the Tk thread once the job finishes
+
+        Returns:
+            int: Identifier of the new job
+        """
+        with self._lock:
+            if self._cancel_event is not None:
+                self._cancel_event.set()
+            self._job_id += 1
+            job_id = self._job_id
+            cancel_event = threading.Event()
+            self._cancel_event = cancel_event
+            self._callbacks = (on_piece, on_done)
+
+        self._executor.submit(self._run, job_id, make_stream, cancel_event)
+        self._schedule_poll()
+        return job_id
+
+    def cancel(self):
+        """Abort the in-flight job, if any. Returns True if a job was cancelled."""
+        with self._lock:
+            if self._cancel_event is None or self._cancel_event.is_set():
+                return False
+            self._cancel_event.set()
+            self._callbacks = None
+            return True
+
+    def is_busy(self):
+        with self._lock:
+            return self._cancel_event is not None and not self._cancel_event.is_set()
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _run(self, job_id, make_stream, cancel_event):
+        stream = None
+        try:
+            stream = make_stream()
+            for piece in stream:
+                if cancel_event.is_set():
+                    break
+                self._events.put((job_id, "piece", piece))
+        except Exception:
+            traceback.print_exc()
+        finally:
+            # Closing the generator closes the HTTP stream behind it
+            if hasattr(stream, "close"):
+                stream.close()
+            self._events.put((job_id, "done", None))
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        """Drain queued output on the Tk thread; stops rescheduling once idle."""
+        self._polling = False
+        while True:
+            try:
+                job_id, kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+
+            with self._lock:
+                current = job_id == self._job_id and self._callbacks is not None
+                callbacks = self._callbacks
+                if current and kind == "done":
+                    self._cancel_event.set()
+                    self._callbacks = None
+            if not current:
+                continue
+
+            on_piece, on_done = callbacks
+            if kind == "piece":
+                on_piece(payload)
+            elif on_done is not None:
+                on_done()
+
+        if self.is_busy() or not self._events.empty():
+            self._schedule_poll()
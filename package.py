@@ -1,3 +1,4 @@
+import argparse
 import os
 import subprocess
 import platform
@@ -12,13 +13,14 @@ def install_dependencies():
     subprocess.run([pip_path, 'install', '-r', 'requirements.txt'], check=True)
     subprocess.run([pip_path, 'install', 'pyinstaller'], check=True)
 
-def build_executable():
+def build_executable(onedir=False):
     """Build standalone executable using PyInstaller."""
     pyinstaller_path = 'venv/Scripts/pyinstaller' if platform.system() == 'Windows' else 'venv/bin/pyinstaller'
     
     subprocess.run([
         pyinstaller_path, 
-        '--onefile', 
+        # --onedir skips unpacking the whole bundle to a temp directory on every launch
+        '--onedir' if onedir else '--onefile', 
         '--windowed',
         '--add-data', 'assets:assets',
         '--name', 'AISummarizer',
@@ -26,9 +28,14 @@ def build_executable():
     ], check=True)
 
 def main():
+    parser = argparse.ArgumentParser(description="Package the desktop app with PyInstaller.")
+    parser.add_argument('--onedir', action='store_true',
+                        help="build a folder instead of a single file, for faster startup")
+    args = parser.parse_args()
+
     create_virtual_environment()
     install_dependencies()
-    build_executable()
+    build_executable(onedir=args.onedir)
     print("Packaging complete! Check the 'dist' directory.")
 
 if __name__ == '__main__':
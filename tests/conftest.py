@@ -0,0 +1,29 @@
+import os
+import sys
+import tempfile
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# The desktop and web modules import each other by name, as when run from their directories
+sys.path.insert(0, os.path.join(HERE, "..", "desktop"))
+sys.path.insert(0, os.path.join(HERE, "..", "web"))
+
+# config.py refuses to load without a key; tests only talk to local stand-ins
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("CACHE_PATH", "")
+
+# The web app configures itself on import, so point it at a throwaway database first
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="shortify-tests-"), "app.db"))
+os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+os.environ.setdefault("STRIPE_SECRET_KEY", "sk_test_key")
+os.environ.setdefault("STRIPE_WEBHOOK_SECRET", "whsec_test")
+
+@pytest.fixture(scope="session")
+def web():
+    """The web app module, with its tables created."""
+    import app as web
+    web.initialize_database()
+    yield web
+    web.hasher.shutdown()
+    web.job_queue.shutdown()
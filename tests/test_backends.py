@@ -0,0 +1,105 @@
+import time
+from types import SimpleNamespace
+import httpx
+import openai
+import pytest
+import summarizer
+from backends import BackendRouter, ExtractiveBackend, RemoteBackend
+from cache import summary_cache
+from extractive import extractive_summary, split_sentences
+from ratelimit import BackendLimiter
+
+REQUEST = httpx.Request("POST", "https://api.test/v1/chat/completions")
+
+def article(sentences=20):
+    topics = ["budget", "hiring", "regions", "suppliers", "pricing"]
+    return " ".join(
+        f"Sentence {i} covers the {topics[i % len(topics)]} plan and its {topics[(i * 3) % len(topics)]} risks."
+        for i in range(sentences)
+    )
+
+class FakeClient:
+    """Stands in for the OpenAI client: answers with reply, or raises error."""
+
+    def __init__(self, reply="Remote summary of the text, long enough to pass validation checks. " * 2, error=None):
+        self.reply = reply
+        self.error = error
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **options):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        message = SimpleNamespace(content=self.reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+def make_router(client, **options):
+    remote = RemoteBackend(client_factory=lambda: client, limiter=BackendLimiter(max_retries=0))
+    return BackendRouter(remote=remote, local=ExtractiveBackend(min_ratio=2), **options)
+
+def server_error(status):
+    return openai.APIStatusError("failed", response=httpx.Response(status, request=REQUEST), body=None)
+
+def test_short_input_goes_remote():
+    router = make_router(FakeClient(), mode="auto")
+    assert router.choose("summarize", "Too short to cut down.", max_length=150) is router.remote
+
+def test_input_the_local_engine_can_shorten_goes_local():
+    router = make_router(FakeClient(), mode="auto", local_max_words=500)
+    assert router.choose("summarize", article(), max_length=20) is router.local
+    assert router.choose("paraphrase", article(), max_length=20) is router.remote
+
+def test_long_input_goes_local_only_while_remote_is_slow():
+    router = make_router(FakeClient(), mode="auto", local_max_words=10, latency_budget_ms=500)
+    text = article()
+    assert router.choose("summarize", text, max_length=20) is router.remote
+
+    router.remote.latency_ewma = 2.0
+    router.remote.latency_sampled_at = time.monotonic()
+    assert router.choose("summarize", text, max_length=20) is router.local
+
+    router.remote.latency_sampled_at = time.monotonic() - 120  # stale sample
+    assert router.choose("summarize", text, max_length=20) is router.remote
+
+@pytest.mark.parametrize("error", [openai.APIConnectionError(request=REQUEST), server_error(500), server_error(503)])
+def test_falls_back_when_remote_is_unavailable(error):
+    router = make_router(FakeClient(error=error))
+    with pytest.raises(type(error)):
+        router.remote.run("summarize", article(), max_length=20)
+    assert router.fallback("summarize", error, article(), max_length=20) is router.local
+
+def test_no_fallback_for_client_errors_or_unshortenable_input():
+    router = make_router(FakeClient())
+    assert router.fallback("summarize", server_error(400), article(), max_length=20) is None
+    connection = openai.APIConnectionError(request=REQUEST)
+    assert router.fallback("summarize", connection, "Too short to cut down.", max_length=20) is None
+    assert router.fallback("paraphrase", connection, article(), max_length=20) is None
+
+def test_summarizer_answers_offline_from_the_local_engine(monkeypatch):
+    client = FakeClient(error=openai.APIConnectionError(request=REQUEST))
+    monkeypatch.setattr(summarizer, "router", make_router(client, mode="remote"))
+    summary_cache.clear()
+    try:
+        result = summarizer.run_action("summarize", article(), max_length=30)
+    finally:
+        summary_cache.clear()
+    assert client.calls == 1
+    assert len(result.split()) <= 30
+    assert set(split_sentences(result)) <= set(split_sentences(article()))
+
+@pytest.mark.parametrize("max_words", [15, 40, 80])
+def test_textrank_respects_the_length_and_keeps_sentence_order(max_words):
+    text = article(30)
+    summary = extractive_summary(text, max_words=max_words)
+    assert 0 < len(summary.split()) <= max_words
+    picked = split_sentences(summary)
+    positions = [split_sentences(text).index(sentence) for sentence in picked]
+    assert positions == sorted(positions)
+
+def test_extractive_backend_refuses_to_return_the_input():
+    backend = ExtractiveBackend()
+    text = "One sentence here. And a second one."
+    assert not backend.can_shorten(text, max_length=150)
+    with pytest.raises(ValueError, match="too short"):
+        backend.run("summarize", text, max_length=150)
@@ -0,0 +1,23 @@
+import asyncio
+import json
+import batch
+
+def test_bad_jsonl_lines_are_recorded_and_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "run_action", lambda text, **settings: text.upper())
+    source = tmp_path / "input.jsonl"
+    source.write_text(
+        '{"id": "a", "text": "first"}\n'
+        '{not json\n'
+        '{"id": "c", "body": "no text key"}\n'
+        '[1, 2]\n'
+        '{"id": "e", "text": "last"}\n',
+        encoding="utf-8",
+    )
+    output = tmp_path / "output.jsonl"
+
+    counts = asyncio.run(batch.run_batch(str(source), str(output), concurrency=2, action="summarize"))
+
+    records = {r["id"]: r for r in map(json.loads, output.read_text(encoding="utf-8").splitlines())}
+    assert counts == {"ok": 2, "error": 3, "skipped": 0}
+    assert records["a"]["summary"] == "FIRST" and records["e"]["summary"] == "LAST"
+    assert {records[i]["status"] for i in ("2", "c", "4")} == {"error"}
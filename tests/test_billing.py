@@ -0,0 +1,124 @@
+import threading
+import time
+import pytest
+import stripe
+from billing import FulfillmentWorker
+from stripe_mock import paid_event, signed_webhook, start_stripe_mock
+
+SECRET = "whsec_test"
+
+@pytest.fixture(scope="module")
+def stripe_api():
+    server, state, url = start_stripe_mock(latency_ms=0)
+    previous = stripe.api_base
+    stripe.api_base = url
+    yield state
+    stripe.api_base = previous
+    server.shutdown()
+
+@pytest.fixture
+def customer(web, stripe_api, request):
+    """A signed-in test client and the id of its user."""
+    name = request.node.name.replace("_", "-")[:60]
+    client = web.app.test_client()
+    form = {"username": name, "email": f"{name}@example.com", "password": "password"}
+    assert client.post("/register", data=form).status_code == 302
+    assert client.post("/login", data={"email": form["email"], "password": "password"}).status_code == 302
+    with web.app.app_context():
+        user_id = web.User.query.filter_by(email=form["email"]).one().id
+    return client, user_id
+
+def checkout(client, state):
+    response = client.post("/create-checkout-session")
+    assert response.status_code == 303
+    session_id = response.headers["Location"].rsplit("/", 1)[-1]
+    return state.sessions[session_id]
+
+def deliver(client, event, secret=SECRET):
+    payload, signature = signed_webhook(event, secret)
+    return client.post("/stripe/webhook", data=payload, headers={"Stripe-Signature": signature})
+
+def settled_status(web, event_id, timeout=5):
+    """The stored event's status once fulfillment has moved it out of pending."""
+    deadline = time.monotonic() + timeout
+    while True:
+        with web.app.app_context():
+            status = web.db.session.get(web.StripeEvent, event_id).status
+        if status != "pending" or time.monotonic() > deadline:
+            return status
+        time.sleep(0.02)
+
+def is_premium(web, user_id):
+    with web.app.app_context():
+        return web.db.session.get(web.User, user_id).is_premium
+
+def test_paid_checkout_upgrades_the_user(web, stripe_api, customer):
+    client, user_id = customer
+    session = checkout(client, stripe_api)
+    assert session["client_reference_id"] == str(user_id)
+
+    event = paid_event(session)
+    assert deliver(client, event).status_code == 200
+    assert settled_status(web, event["id"]) == "processed"
+    assert is_premium(web, user_id)
+
+def test_bad_signature_is_rejected(web, stripe_api, customer):
+    client, user_id = customer
+    event = paid_event(checkout(client, stripe_api))
+    assert deliver(client, event, secret="whsec_wrong").status_code == 400
+    with web.app.app_context():
+        assert web.db.session.get(web.StripeEvent, event["id"]) is None
+    assert not is_premium(web, user_id)
+
+def test_duplicate_delivery_is_recorded_once(web, stripe_api, customer):
+    client, user_id = customer
+    event = paid_event(checkout(client, stripe_api))
+    assert deliver(client, event).status_code == 200
+    assert deliver(client, event).status_code == 200
+    assert settled_status(web, event["id"]) == "processed"
+    with web.app.app_context():
+        assert web.StripeEvent.query.filter_by(id=event["id"]).count() == 1
+    assert is_premium(web, user_id)
+
+@pytest.mark.parametrize("reference", [None, "not-a-number", "999999"])
+def test_session_without_a_known_user_is_ignored_at_once(web, reference):
+    session = {"id": f"cs_external_{reference}", "payment_status": "paid", "client_reference_id": reference}
+    event = paid_event(session)
+    assert deliver(web.app.test_client(), event).status_code == 200
+    assert settled_status(web, event["id"]) == "ignored"
+    assert web.fulfillment.pending() == 0  # nothing scheduled for a retry
+
+def test_worker_retries_then_gives_up():
+    attempts = []
+    gave_up = []
+    done = threading.Event()
+
+    def handler(event_id):
+        attempts.append(event_id)
+        raise RuntimeError("database unavailable")
+
+    def on_give_up(event_id, error):
+        gave_up.append((event_id, str(error)))
+        done.set()
+
+    worker = FulfillmentWorker(handler, on_give_up=on_give_up, max_attempts=3, base_delay=0.01, max_delay=0.02)
+    worker.submit("evt_1")
+    assert done.wait(5)
+    assert attempts == ["evt_1"] * 3
+    assert gave_up == [("evt_1", "database unavailable")]
+
+def test_worker_stops_retrying_once_the_handler_succeeds():
+    attempts = []
+    done = threading.Event()
+
+    def handler(event_id):
+        attempts.append(event_id)
+        if len(attempts) < 2:
+            raise RuntimeError("locked")
+        done.set()
+
+    worker = FulfillmentWorker(handler, on_give_up=lambda *args: pytest.fail("gave up"), base_delay=0.01)
+    worker.submit("evt_2")
+    assert done.wait(5)
+    time.sleep(0.05)
+    assert attempts == ["evt_2", "evt_2"]
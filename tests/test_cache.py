@@ -0,0 +1,73 @@
+import threading
+import time
+from cache import SummaryCache, make_key
+
+def test_key_ignores_spacing_and_parameter_order():
+    assert make_key("a  b\nc", style="formal", max_length=150) == make_key(" a b c ", max_length=150, style="formal")
+
+def test_key_changes_with_style_length_and_model():
+    base = dict(action="summarize", model="gpt", style="default", min_length=100, max_length=150)
+    keys = {make_key("text", **base)}
+    for field, value in (("style", "formal"), ("max_length", 80), ("min_length", 50), ("model", "other")):
+        keys.add(make_key("text", **dict(base, **{field: value})))
+    assert len(keys) == 5
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SummaryCache(max_entries=2, path="")
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"  # a is now the most recent
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("A", "C")
+    assert cache.stats()["evictions"] == 1
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = SummaryCache(path=path)
+    first.put("key", "summary", cost=1.5)
+    first.close()
+
+    second = SummaryCache(path=path)
+    try:
+        assert second.get("key") == "summary"
+        assert second.stats()["disk_hits"] == 1
+        assert second.stats()["saved_seconds"] == 1.5
+        second.clear()
+    finally:
+        second.close()
+    third = SummaryCache(path=path)
+    try:
+        assert third.get("key") is None
+    finally:
+        third.close()
+
+def test_get_or_compute_computes_once():
+    cache = SummaryCache(path="")
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute("key", lambda: calls.append(1) or "value") == "value"
+    assert len(calls) == 1
+
+def test_concurrent_misses_share_one_compute():
+    cache = SummaryCache(path="")
+    calls = []
+    barrier = threading.Barrier(8)
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    def worker():
+        barrier.wait()
+        results.append(cache.get_or_compute("key", compute))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 8
+    assert len(calls) == 1
@@ -0,0 +1,57 @@
+import random
+import time
+from chunking import estimate_tokens, map_reduce, split_into_chunks
+
+def test_chunks_keep_order_and_fit_the_budget():
+    paragraphs = [f"Paragraph {i} says something about item {i}." * 5 for i in range(40)]
+    chunks = split_into_chunks("\n\n".join(paragraphs), max_tokens=200)
+    assert len(chunks) > 1
+    assert "\n\n".join(chunks).split("\n\n") == paragraphs
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+
+def test_oversized_paragraph_is_split_on_sentences_then_words():
+    sentences = " ".join(f"Sentence number {i} is here." for i in range(200))
+    chunks = split_into_chunks(sentences, max_tokens=100)
+    assert len(chunks) > 1
+    assert " ".join(chunks).split() == sentences.split()
+
+    words = " ".join(f"word{i}" for i in range(2000))
+    chunks = split_into_chunks(words, max_tokens=100)
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    assert " ".join(chunks).split() == words.split()
+
+def test_short_text_is_one_chunk():
+    assert split_into_chunks("Just one short paragraph.") == ["Just one short paragraph."]
+
+def merge(parts):
+    return "(" + " ".join(parts) + ")"
+
+def test_map_reduce_keeps_chunk_order_despite_concurrency():
+    rng = random.Random(1)
+    delays = [rng.uniform(0, 0.01) for _ in range(12)]
+
+    def summarize(chunk):
+        time.sleep(delays[int(chunk)])
+        return f"s{chunk}"
+
+    chunks = [str(i) for i in range(12)]
+    assert map_reduce(chunks, summarize, merge, workers=6, fan_in=4, max_depth=3) == (
+        "((s0 s1 s2 s3) (s4 s5 s6 s7) (s8 s9 s10 s11))"
+    )
+
+def test_last_level_merges_everything_at_max_depth():
+    chunks = [str(i) for i in range(9)]
+    assert map_reduce(chunks, lambda c: c, merge, fan_in=2, max_depth=2) == "((0 1) (2 3) (4 5) (6 7) (8))"
+
+def test_single_chunk_still_gets_the_final_merge():
+    calls = []
+
+    def final(parts):
+        calls.append(parts)
+        return "styled " + parts[0]
+
+    assert map_reduce(["only"], lambda c: "section summary", final) == "styled section summary"
+    assert calls == [["section summary"]]
+
+def test_no_chunks():
+    assert map_reduce([], lambda c: c, merge) == ""
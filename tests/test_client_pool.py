@@ -0,0 +1,23 @@
+import pytest
+import client
+from mock_server import start_mock_server
+
+@pytest.fixture
+def mock_api(monkeypatch):
+    server, url = start_mock_server(latency_ms=1, tokens_per_second=0)
+    monkeypatch.setattr(client, "OPENAI_BASE_URL", url)
+    client.close_client()
+    yield server.RequestHandlerClass.settings
+    client.close_client()
+    server.shutdown()
+
+def test_calls_share_one_pooled_connection(mock_api):
+    for _ in range(5):
+        client.get_client().chat.completions.create(
+            model="mock", messages=[{"role": "user", "content": "hello"}], max_tokens=8,
+        )
+    assert mock_api.requests == 5
+    assert mock_api.connections == 1
+
+def test_get_client_returns_the_shared_instance(mock_api):
+    assert client.get_client() is client.get_client()
@@ -0,0 +1,69 @@
+import heapq
+import time
+from clipboard import ClipboardCapture
+
+class FakeRoot:
+    """Runs after() callbacks in time order, sleeping until each is due."""
+
+    def __init__(self):
+        self._queue = []
+        self._count = 0
+
+    def after(self, ms, fn):
+        self._count += 1
+        heapq.heappush(self._queue, (time.perf_counter() + ms / 1000.0, self._count, fn))
+
+    def run(self):
+        while self._queue:
+            due, _, fn = heapq.heappop(self._queue)
+            time.sleep(max(0.0, due - time.perf_counter()))
+            fn()
+
+class FakeClipboard:
+    """Clipboard whose ctrl+c delivers selection lag_ms later, or never if selection is None."""
+
+    def __init__(self, content, selection=None, lag_ms=0):
+        self.content = content
+        self.selection = selection
+        self.lag_ms = lag_ms
+        self._lands_at = None
+
+    def paste(self):
+        if self._lands_at is not None and time.perf_counter() >= self._lands_at:
+            self.content = self.selection
+            self._lands_at = None
+        return self.content
+
+    def copy(self, text):
+        self.content = text
+
+    def send_copy(self):
+        if self.selection is not None:
+            self._lands_at = time.perf_counter() + self.lag_ms / 1000.0
+
+def capture(board, **options):
+    root = FakeRoot()
+    results = []
+    ClipboardCapture(root, paste=board.paste, copy=board.copy, send_copy=board.send_copy,
+                     **options).capture(results.append)
+    root.run()
+    return results
+
+def test_returns_selection_and_restores_previous_text():
+    board = FakeClipboard("previous", selection="selected text", lag_ms=20)
+    assert capture(board, timeout_ms=500) == ["selected text"]
+    assert board.content == "previous"
+
+def test_selection_equal_to_previous_clipboard_is_detected():
+    board = FakeClipboard("same", selection="same", lag_ms=20)
+    assert capture(board, timeout_ms=500) == ["same"]
+
+def test_without_restore_the_selection_stays_on_the_clipboard():
+    board = FakeClipboard("previous", selection="selected text", lag_ms=5)
+    assert capture(board, timeout_ms=500, restore=False) == ["selected text"]
+    assert board.content == "selected text"
+
+def test_timeout_removes_the_marker_even_without_restore():
+    board = FakeClipboard("previous", selection=None)
+    assert capture(board, timeout_ms=30, restore=False) == [""]
+    assert board.content == "previous"
@@ -0,0 +1,27 @@
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+from database import engine_options
+
+def test_file_sqlite_gets_a_sized_queue_pool(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'x.db'}"
+    engine = create_engine(uri, **engine_options(uri, pool_size=3))
+    try:
+        assert isinstance(engine.pool, QueuePool)
+        assert engine.pool.size() == 3
+    finally:
+        engine.dispose()
+
+def test_memory_sqlite_is_not_pooled():
+    assert engine_options("sqlite://") == {}
+
+def test_parallel_registrations_never_lock_the_database(web):
+    from load_test import run_register_scenario
+
+    web.hasher.shutdown()  # forked workers start their own bcrypt pools
+    result = run_register_scenario(processes=4, registrations=25)
+    assert result["locked"] == 0
+    assert result["other_errors"] == 0
+    assert result["ok"] == 100
+    # Logins look users up by index, not by scanning the table
+    for plan in result["query_plans"].values():
+        assert any("INDEX" in step for step in plan)
@@ -0,0 +1,79 @@
+import os
+import pytest
+import client
+from cache import summary_cache
+from jobs import JobQueue, run_summarizer_job
+from mock_server import start_mock_server
+
+def crashing_job(action, text, settings):
+    """Kills its worker process the first time, or every time with settings["always"]."""
+    marker = settings["marker"]
+    if settings.get("always") or not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return {"ok": True, "result": text.upper(), "usage": None}
+
+@pytest.fixture
+def jobs():
+    queue = JobQueue(workers=1, job_fn=crashing_job)
+    yield queue
+    queue.shutdown()
+
+def wait(job):
+    assert job.done.wait(30)
+    return job
+
+def test_job_survives_a_dead_worker(jobs, tmp_path):
+    marker = str(tmp_path / "crashed")
+    job = wait(jobs.submit("summarize", "hello", {"marker": marker}))
+    assert os.path.exists(marker)
+    assert (job.status, job.result, job.attempts) == ("done", "HELLO", 2)
+
+def test_pool_keeps_working_after_a_job_that_always_crashes(jobs, tmp_path):
+    crasher = wait(jobs.submit("summarize", "boom", {"marker": str(tmp_path / "a"), "always": True}))
+    assert crasher.status == "error"
+    assert crasher.client_error is False
+
+    marker = tmp_path / "b"
+    marker.touch()
+    later = wait(jobs.submit("summarize", "still up", {"marker": str(marker)}))
+    assert (later.status, later.result, later.attempts) == ("done", "STILL UP", 1)
+
+def test_followers_see_the_retried_result(jobs, tmp_path):
+    settings = {"marker": str(tmp_path / "crashed")}
+    leader = jobs.submit("summarize", "shared", settings)
+    follower = jobs.submit("summarize", "shared", settings)
+    assert wait(follower).result == "SHARED"
+    assert leader.status == "done"
+
+@pytest.fixture
+def mock_api(monkeypatch):
+    server, url = start_mock_server(latency_ms=1, tokens_per_second=0)
+    monkeypatch.setattr(client, "OPENAI_BASE_URL", url)
+    client.close_client()
+    summary_cache.clear()
+    yield server.RequestHandlerClass.settings
+    summary_cache.clear()
+    client.close_client()
+    server.shutdown()
+
+def paragraphs(prefix, count=60):
+    return [f"{prefix} paragraph {i} explains one more detail of the quarterly plan. " * 6 for i in range(count)]
+
+def test_only_a_whole_cached_result_is_a_cache_hit(mock_api):
+    text = "The committee met to review the budget and agreed to fund the new program next year."
+    first = run_summarizer_job("summarize", text, {})
+    again = run_summarizer_job("summarize", text, {})
+    assert first["ok"] and again["ok"]
+    assert (first["usage"]["cache_hit"], again["usage"]["cache_hit"]) == (False, True)
+
+def test_partly_cached_long_document_is_not_a_cache_hit(mock_api):
+    shared = paragraphs("Shared")
+    assert run_summarizer_job("summarize", "\n\n".join(shared), {})["ok"]
+    requests = mock_api.requests
+
+    # Same sections plus one new one: most parts come from the cache, but the backend still runs
+    edited = run_summarizer_job("summarize", "\n\n".join(shared + paragraphs("Appended", 20)), {})
+    assert edited["ok"]
+    assert mock_api.requests > requests
+    assert edited["usage"]["cache_hit"] is False
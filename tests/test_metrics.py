@@ -0,0 +1,70 @@
+import re
+from metrics import BUCKETS, Metrics
+
+def render(registry):
+    return registry.render_prometheus().splitlines()
+
+def test_counters_render_with_type_and_escaped_labels():
+    registry = Metrics(enabled=True, prefix="app")
+    registry.inc("requests", endpoint="index")
+    registry.inc("requests", 2, endpoint='say "hi"\\now\nplease')
+    lines = render(registry)
+    assert lines.count("# TYPE app_requests_total counter") == 1
+    assert 'app_requests_total{endpoint="index"} 1' in lines
+    assert 'app_requests_total{endpoint="say \\"hi\\"\\\\now\\nplease"} 2' in lines
+
+def test_labels_of_mixed_types_still_render():
+    registry = Metrics(enabled=True, prefix="app")
+    registry.inc("retries", status=429)
+    registry.inc("retries", status="connection")
+    lines = render(registry)
+    assert 'app_retries_total{status="429"} 1' in lines
+    assert 'app_retries_total{status="connection"} 1' in lines
+
+def test_histogram_has_cumulative_buckets_sum_and_count():
+    registry = Metrics(enabled=True, prefix="app")
+    for seconds in (0.003, 0.2, 0.2, 100.0):
+        registry.observe("request", seconds, endpoint="index")
+    lines = render(registry)
+    assert "# TYPE app_request_seconds histogram" in lines
+
+    buckets = [line for line in lines if line.startswith("app_request_seconds_bucket")]
+    assert len(buckets) == len(BUCKETS) + 1
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts)  # cumulative
+    assert 'app_request_seconds_bucket{endpoint="index",le="0.005"} 1' in lines
+    assert 'app_request_seconds_bucket{endpoint="index",le="0.25"} 3' in lines
+    assert 'app_request_seconds_bucket{endpoint="index",le="30.0"} 3' in lines
+    assert 'app_request_seconds_bucket{endpoint="index",le="+Inf"} 4' in lines
+    assert 'app_request_seconds_sum{endpoint="index"} 100.403000' in lines
+    assert 'app_request_seconds_count{endpoint="index"} 4' in lines
+
+def test_every_sample_line_is_well_formed():
+    registry = Metrics(enabled=True, prefix="app")
+    registry.inc("plain")
+    registry.inc("labelled", kind="a", result="ok")
+    registry.observe("timed", 0.01)
+    sample = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_]\w*="([^"\\]|\\.)*",?)+\})? \S+$')
+    for line in render(registry):
+        assert line.startswith("# TYPE ") or sample.match(line), line
+
+def test_disabled_registry_renders_nothing():
+    registry = Metrics(enabled=False)
+    registry.inc("requests")
+    assert registry.render_prometheus() == "\n"
+
+def test_metrics_endpoint_is_local_only_without_a_token(web, monkeypatch):
+    monkeypatch.setitem(web.app.config, "METRICS_TOKEN", None)
+    client = web.app.test_client()
+    assert client.get("/metrics").status_code == 200
+    assert client.get("/metrics", environ_base={"REMOTE_ADDR": "203.0.113.7"}).status_code == 403
+
+def test_metrics_endpoint_requires_the_token(web, monkeypatch):
+    monkeypatch.setitem(web.app.config, "METRICS_TOKEN", "scrape-secret")
+    client = web.app.test_client()
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 403
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"},
+                          environ_base={"REMOTE_ADDR": "203.0.113.7"})
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
@@ -0,0 +1,92 @@
+from outline import CodeOutliner, outline_braced, outline_python, outline_ruby
+from prompts import count_tokens
+
+def test_named_es_imports_survive():
+    code = 'import { foo, bar } from "./foo";\nimport {\n  baz,\n  qux,\n} from "./baz";\n'
+    assert outline_braced(code).splitlines() == [
+        'import { foo, bar } from "./foo";',
+        'import { baz, qux, } from "./baz";',
+    ]
+
+def test_go_grouped_imports_and_struct_fields():
+    code = (
+        'package main\n\nimport (\n\t"fmt"\n\t"os"\n)\n\n'
+        'type Config struct {\n\tName string\n\tPort int `json:"port"`\n}\n\n'
+        'func (c *Config) Print() {\n\tfmt.Println(c.Name)\n\tos.Exit(0)\n}\n'
+    )
+    lines = outline_braced(code).splitlines()
+    assert 'import ( "fmt" "os" )' in lines
+    assert "    Name string" in lines
+    assert '    Port int `json:"port"`' in lines
+    assert "func (c *Config) Print() { /* calls: fmt.Println, os.Exit */ }" in lines
+
+def test_typescript_interface_members_and_function_bodies():
+    code = (
+        "interface User {\n  id: number\n  name?: string\n}\n"
+        "export function load(id: number): User {\n  if (id < 0) { throw new Error('bad') }\n"
+        "  return fetchUser(id)\n}\n"
+    )
+    lines = outline_braced(code).splitlines()
+    assert lines[:4] == ["interface User {", "    id: number", "    name?: string", "}"]
+    assert lines[4] == "export function load(id: number): User { /* calls: Error, fetchUser */ }"
+
+def test_braces_inside_strings_and_comments_are_ignored():
+    code = 'function f() {\n  // } not a brace\n  log("{")\n}\nfunction g() {\n  h()\n}\n'
+    assert outline_braced(code).splitlines() == [
+        "function f() { /* calls: log */ }",
+        "function g() { /* calls: h */ }",
+    ]
+
+def test_allman_style_headers_are_kept():
+    code = "public class Foo\n{\n    private int count;\n    public void bar(int x)\n    {\n        helper.run(x);\n    }\n}\n"
+    assert outline_braced(code).splitlines() == [
+        "public class Foo {",
+        "    private int count;",
+        "    public void bar(int x) { /* calls: helper.run */ }",
+        "}",
+    ]
+
+def test_python_outline_keeps_structure_and_drops_bodies():
+    code = (
+        'import os\n\n'
+        'class Store(Base):\n    """Keeps items.\n\n    Longer text."""\n    limit = 10\n\n'
+        '    def add(self, item, *, force=False) -> bool:\n        """Add one item."""\n'
+        '        path = os.path.join("a", item)\n        return self.save(path)\n'
+    )
+    assert outline_python(code).splitlines() == [
+        "import os",
+        "class Store(Base):",
+        '    """Keeps items."""',
+        "    limit = ...",
+        "    def add(self, item, *, force=False) -> bool: ...",
+        '        """Add one item."""',
+        "        # calls: os.path.join, self.save",
+    ]
+
+def test_ruby_outline_lists_calls_under_each_def():
+    code = 'require "json"\nclass Foo < Bar\n  # note\n  def initialize(x)\n    @x = compute(x)\n  end\nend\n'
+    assert outline_ruby(code).splitlines() == [
+        'require "json"',
+        "class Foo < Bar",
+        "  def initialize(x)  # calls: compute",
+    ]
+
+def test_outliner_falls_back_to_raw_code_and_caches():
+    outliner = CodeOutliner(min_tokens=10, budget=1000)
+    broken = "def f(:\n" + "x = compute(1)\n" * 50
+    assert outliner.compact(broken, "python") == broken
+
+    source = "".join(f"def f{i}(a, b):\n    return helper(a) + other(b) * {i}\n\n" for i in range(40))
+    outline = outliner.compact(source, "python")
+    assert "def f0(a, b): ..." in outline and "return" not in outline
+    assert outliner.compact(source, "python") is outline
+
+def test_short_snippets_are_sent_whole():
+    outliner = CodeOutliner(min_tokens=400, budget=1000)
+    assert outliner.compact("def f():\n    return 1\n", "python") == "def f():\n    return 1\n"
+
+def test_outline_is_trimmed_to_the_budget():
+    source = "".join(f"def function_number_{i}(alpha, beta):\n    return alpha\n\n" for i in range(200))
+    outline = CodeOutliner(min_tokens=10, budget=100).compact(source, "python")
+    assert outline.endswith("# ... (truncated)")
+    assert count_tokens(outline) <= 100
@@ -0,0 +1,42 @@
+import os
+import signal
+import pytest
+from passwords import HasherBusy, PasswordHasher, hash_rounds
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(rounds=4, workers=1)
+    yield hasher
+    hasher.shutdown()
+
+def test_hash_and_check(hasher):
+    hashed = hasher.hash("correct horse")
+    assert hash_rounds(hashed) == 4
+    assert hasher.check(hashed, "correct horse")
+    assert not hasher.check(hashed, "wrong")
+
+def test_non_bcrypt_hash_does_not_match(hasher):
+    assert hasher.check("pbkdf2:sha256:legacy", "anything") is False
+    assert hash_rounds("pbkdf2:sha256:legacy") is None
+
+def test_needs_rehash_when_the_work_factor_changes(hasher):
+    hashed = hasher.hash("secret")
+    assert not hasher.needs_rehash(hashed)
+    assert PasswordHasher(rounds=5).needs_rehash(hashed)
+
+def test_busy_when_too_many_are_pending():
+    hasher = PasswordHasher(rounds=4, workers=1, max_pending=1, timeout=0.01)
+    hasher._pending.acquire()  # one request already waiting for the pool
+    try:
+        with pytest.raises(HasherBusy):
+            hasher.hash("secret")
+    finally:
+        hasher._pending.release()
+        hasher.shutdown()
+
+def test_pool_is_rebuilt_after_a_worker_dies(hasher):
+    hashed = hasher.hash("secret")
+    for pid in list(hasher._executor._processes):
+        os.kill(pid, signal.SIGKILL)
+    assert hasher.check(hashed, "secret")
+    assert hasher.check(hasher.hash("again"), "again")
@@ -0,0 +1,76 @@
+import itertools
+import pytest
+from prompts import (
+    MAX_OUTPUT_TOKENS, MIN_OUTPUT_TOKENS, SECTION_OUTPUT_TOKENS, STYLE_INSTRUCTIONS,
+    build_prompt, compact_whitespace, count_tokens, output_budget,
+)
+
+ARTICLE = "The committee reviewed the budget and approved funding for three new regional offices. "
+
+def test_count_tokens_tracks_words_numbers_and_punctuation():
+    assert count_tokens("") == 0
+    assert count_tokens("cat sat") == 2
+    assert count_tokens("internationalization") == 5  # one token per four letters
+    assert count_tokens("12345, ok!") == 5  # "123", "45", ",", "ok", "!"
+
+@pytest.mark.parametrize("max_words, expected", [
+    (1, MIN_OUTPUT_TOKENS),
+    (20, MIN_OUTPUT_TOKENS),
+    (150, 254),
+    (400, 675),
+    (5000, MAX_OUTPUT_TOKENS),
+])
+def test_output_budget_is_clamped(max_words, expected):
+    assert output_budget(max_words) == expected
+
+def test_output_budget_grows_with_the_word_limit():
+    budgets = [output_budget(words) for words in range(1, 2000, 25)]
+    assert budgets == sorted(budgets)
+    assert MIN_OUTPUT_TOKENS <= min(budgets) and max(budgets) == MAX_OUTPUT_TOKENS
+
+def test_long_input_does_not_change_the_output_budget():
+    short = build_prompt("summarize", ARTICLE, max_length=150)
+    long = build_prompt("summarize", ARTICLE * 2000, max_length=150)
+    assert long.max_tokens == short.max_tokens == output_budget(150)
+    assert long.input_tokens > 1000 * short.input_tokens // 2
+    assert long.total_tokens == long.input_tokens + long.max_tokens
+
+def test_sections_get_a_fixed_budget():
+    prompt = build_prompt("section", ARTICLE * 500, max_length=5000)
+    assert prompt.max_tokens == SECTION_OUTPUT_TOKENS
+
+def test_input_tokens_cover_system_prefix_and_body():
+    prompt = build_prompt("summarize", ARTICLE)
+    assert prompt.input_tokens == count_tokens(prompt.system) + count_tokens(prompt.user)
+
+@pytest.mark.parametrize("action, style, lengths", list(itertools.product(
+    ["summarize", "paraphrase", "merge"],
+    sorted(STYLE_INSTRUCTIONS),
+    [(10, 30), (100, 150), (300, 600)],
+)))
+def test_every_style_and_length_reaches_the_prompt(action, style, lengths):
+    min_length, max_length = lengths
+    prompt = build_prompt(action, ARTICLE, max_length=max_length, min_length=min_length, style=style)
+    assert f"{min_length}-{max_length} words" in prompt.system
+    hints = [hint for hint in STYLE_INSTRUCTIONS.values() if hint and hint in prompt.system]
+    assert hints == ([STYLE_INSTRUCTIONS[style]] if STYLE_INSTRUCTIONS[style] else [])
+    assert prompt.max_tokens == output_budget(max_length)
+
+def test_unknown_or_missing_style_uses_the_default():
+    default = build_prompt("summarize", ARTICLE, style="default").system
+    assert build_prompt("summarize", ARTICLE, style=None).system == default
+    assert build_prompt("summarize", ARTICLE, style="pirate").system == default
+
+def test_code_prompt_names_the_language_and_keeps_indentation():
+    code = "def f(x):\n    return x  \n\n\n\nprint(f(1))\n"
+    prompt = build_prompt("code_summarize", code, max_length=80, language="Python")
+    assert "written in Python" in prompt.system
+    assert "at most 80 words" in prompt.system
+    assert prompt.user.endswith("def f(x):\n    return x\n\nprint(f(1))")
+
+def test_prose_whitespace_is_compacted():
+    assert compact_whitespace("  a   b  \r\n\n\n\n   c ") == "a b\n\nc"
+
+def test_unknown_action_is_rejected():
+    with pytest.raises(ValueError):
+        build_prompt("translate", ARTICLE)
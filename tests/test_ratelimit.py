@@ -0,0 +1,111 @@
+import pytest
+import client
+import ratelimit
+from mock_server import start_mock_server
+from ratelimit import AdaptiveConcurrency, BackendLimiter, TokenBucket, retry_after
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = FakeResponse(headers or {})
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(ratelimit.time, "sleep", slept.append)
+    return slept
+
+def flaky(*errors, result="ok"):
+    errors = list(errors)
+    calls = []
+    def fn():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+    return fn, calls
+
+def test_retry_after_prefers_milliseconds():
+    assert retry_after(FakeAPIError(429, {"retry-after-ms": "250", "retry-after": "9"})) == 0.25
+    assert retry_after(FakeAPIError(429, {"retry-after": "3"})) == 3.0
+    assert retry_after(FakeAPIError(429)) is None
+
+def test_malformed_retry_after_falls_back_to_backoff(sleeps):
+    assert retry_after(FakeAPIError(503, {"retry-after": "soon, maybe"})) is None
+    limiter = BackendLimiter(requests_per_minute=6000, max_retries=1)
+    fn, calls = flaky(FakeAPIError(503, {"retry-after": "soon, maybe"}), FakeAPIError(503, {"retry-after": "??"}))
+    with pytest.raises(FakeAPIError, match="503"):
+        limiter.call(fn)
+    assert len(calls) == 2
+
+def test_429_is_retried_after_the_requested_delay(sleeps):
+    limiter = BackendLimiter(requests_per_minute=6000, max_retries=3)
+    fn, calls = flaky(FakeAPIError(429, {"retry-after": "2"}))
+    assert limiter.call(fn) == "ok"
+    assert len(calls) == 2
+    assert 2.0 in sleeps
+    assert (limiter.throttled, limiter.retries) == (1, 1)
+
+def test_client_errors_are_not_retried(sleeps):
+    limiter = BackendLimiter(max_retries=3)
+    fn, calls = flaky(FakeAPIError(400))
+    with pytest.raises(FakeAPIError):
+        limiter.call(fn)
+    assert len(calls) == 1
+
+def test_retries_stop_at_max_retries(sleeps):
+    limiter = BackendLimiter(requests_per_minute=6000, max_retries=2)
+    fn, calls = flaky(*(FakeAPIError(503) for _ in range(5)))
+    with pytest.raises(FakeAPIError):
+        limiter.call(fn)
+    assert len(calls) == 3
+
+def test_concurrency_halves_on_throttle_and_grows_back():
+    concurrency = AdaptiveConcurrency(max_limit=8, initial=8)
+    concurrency.on_throttle()
+    assert concurrency.limit == 4
+    for _ in range(20):
+        concurrency.on_success()
+    assert 4 < concurrency.limit <= 8
+
+def test_oversized_request_waits_for_a_full_bucket(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(ratelimit.time, "sleep", lambda seconds: now.__setitem__(0, now[0] + seconds))
+    bucket = TokenBucket(per_minute=60, capacity=10)
+    bucket.acquire(1000)  # larger than the bucket, so it takes everything there is
+    assert now[0] == 100.0
+    bucket.acquire(10)
+    assert now[0] == pytest.approx(110.0)  # refilled at one token per second
+
+@pytest.fixture
+def throttling_api(monkeypatch):
+    server, url = start_mock_server(latency_ms=1, tokens_per_second=0, error_rate=0.4, seed=3)
+    monkeypatch.setattr(client, "OPENAI_BASE_URL", url)
+    client.close_client()
+    yield server.RequestHandlerClass.settings
+    client.close_client()
+    server.shutdown()
+
+def test_mock_server_throttling_is_retried(throttling_api, monkeypatch):
+    sleeps = []
+    real_sleep = ratelimit.time.sleep
+    monkeypatch.setattr(ratelimit.time, "sleep", lambda seconds: (sleeps.append(seconds), real_sleep(seconds)))
+    monkeypatch.setattr(ratelimit, "backoff_delay", lambda attempt: 0.01)
+    limiter = BackendLimiter(requests_per_minute=60000, max_retries=20)
+
+    def call():
+        return client.get_client().chat.completions.create(
+            model="mock", messages=[{"role": "user", "content": "hello"}], max_tokens=8,
+        )
+
+    for _ in range(10):
+        assert limiter.call(call).choices[0].message.content
+    assert throttling_api.requests == 10 + limiter.retries
+    assert limiter.throttled >= 1
+    assert 0.1 in sleeps  # the stand-in's Retry-After for a 429
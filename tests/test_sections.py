@@ -0,0 +1,62 @@
+import random
+import pytest
+from backends import RemoteBackend
+from cache import summary_cache
+from chunking import split_into_chunks, split_into_sections
+
+def document(paragraphs=120, seed=7):
+    rng = random.Random(seed)
+    words = ["alpha", "beta", "gamma", "delta", "kappa", "sigma", "omega", "theta", "lambda", "zeta"]
+    return [
+        " ".join(rng.choice(words) + str(rng.randrange(1000)) for _ in range(40)) + "."
+        for _ in range(paragraphs)
+    ]
+
+class RecordingBackend(RemoteBackend):
+    """Answers every prompt locally and remembers what it was asked."""
+
+    def __init__(self):
+        super().__init__(incremental=True)
+        self.prompts = []
+
+    def complete(self, prompt):
+        self.prompts.append(prompt.user)
+        return f"summary {len(self.prompts)}"
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    summary_cache.clear()
+    yield
+    summary_cache.clear()
+
+def test_sections_cover_the_text_within_budget():
+    paragraphs = document()
+    sections = split_into_sections("\n\n".join(paragraphs), max_tokens=500)
+    assert "\n\n".join(sections).split("\n\n") == paragraphs
+    assert all(len(section) // 4 <= 500 for section in sections)
+
+def test_insert_near_the_start_keeps_later_sections():
+    paragraphs = document()
+    edited = paragraphs[:3] + document(1, seed=99) + paragraphs[3:]
+    before = split_into_sections("\n\n".join(paragraphs), max_tokens=500)
+    after = split_into_sections("\n\n".join(edited), max_tokens=500)
+    assert len(set(before) - set(after)) <= 2
+
+    # Greedy packing shifts every boundary after the insert
+    chunks_before = split_into_chunks("\n\n".join(paragraphs), max_tokens=500)
+    chunks_after = split_into_chunks("\n\n".join(edited), max_tokens=500)
+    assert len(set(chunks_before) - set(chunks_after)) > len(set(before) - set(after))
+
+def test_editing_one_paragraph_resends_only_its_section():
+    paragraphs = document(paragraphs=200)
+    backend = RecordingBackend()
+    backend.run("summarize", "\n\n".join(paragraphs))
+    first = len(backend.prompts)
+    sections = len(split_into_sections("\n\n".join(paragraphs)))
+    assert sections > 1
+
+    paragraphs[150] = paragraphs[150].replace(".", " with a late correction.")
+    backend.run("summarize", "\n\n".join(paragraphs))
+    resent = backend.prompts[first:]
+    assert sum("late correction" in prompt for prompt in resent) == 1
+    assert len(resent) < first
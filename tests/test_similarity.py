@@ -0,0 +1,71 @@
+import pytest
+import summarizer
+from similarity import BANDS, SimilarityIndex, estimated_similarity, minhash
+
+MEMO = (
+    "We recommend approving the merger of the two subsidiaries after the review period, "
+    "subject to the conditions set out in the board memo and the regulator's response. "
+    "The finance team should prepare the integration budget before the next quarterly meeting, "
+    "and legal should confirm that the supplier contracts can be assigned to the new entity."
+)
+NEGATED = MEMO.replace("We recommend", "We do not recommend")
+UNRELATED = "The quarterly picnic moves to the riverside park, and everyone should bring a dish to share."
+
+def test_identical_wording_is_reused_at_the_default_threshold():
+    index = SimilarityIndex()
+    index.add("scope", MEMO, "summary")
+    assert index.lookup("scope", MEMO.upper().replace(",", "")) == "summary"
+
+def test_a_negation_is_not_reused_at_the_default_threshold():
+    assert estimated_similarity(minhash(MEMO), minhash(NEGATED)) > 0.85
+    index = SimilarityIndex()
+    index.add("scope", MEMO, "summary")
+    assert index.lookup("scope", NEGATED) is None
+    assert index.stats()["misses"] == 1
+
+def test_threshold_hit_and_miss():
+    index = SimilarityIndex(threshold=0.8)
+    index.add("scope", MEMO, "summary")
+    assert index.lookup("scope", MEMO.replace("review period", "review window")) == "summary"
+    assert index.lookup("scope", UNRELATED) is None
+    assert (index.hits, index.misses) == (1, 1)
+
+def test_entries_are_scoped():
+    index = SimilarityIndex()
+    index.add("openai|gpt|summarize|default|100|150", MEMO, "summary")
+    assert index.lookup("openai|gpt|summarize|formal|100|150", MEMO) is None
+
+@pytest.fixture
+def reuse_enabled(monkeypatch):
+    monkeypatch.setattr(summarizer, "SIMILARITY_ENABLED", True)
+    return summarizer.router.remote
+
+def test_scope_covers_action_style_length_and_model(reuse_enabled, monkeypatch):
+    remote = reuse_enabled
+    scope = summarizer._similarity_scope(remote, "summarize", MEMO, 150, 100, "default")
+    assert scope is not None
+    assert summarizer._similarity_scope(remote, "paraphrase", MEMO, 150, 100, "default") is None
+    variants = {
+        summarizer._similarity_scope(remote, "summarize", MEMO, 150, 100, "formal"),
+        summarizer._similarity_scope(remote, "summarize", MEMO, 80, 100, "default"),
+        summarizer._similarity_scope(remote, "summarize", MEMO, 150, 50, "default"),
+    }
+    monkeypatch.setattr(remote, "model", "other-model")
+    variants.add(summarizer._similarity_scope(remote, "summarize", MEMO, 150, 100, "default"))
+    assert len(variants) == 4 and scope not in variants
+
+def test_reuse_is_off_by_default():
+    assert summarizer._similarity_scope(summarizer.router.remote, "summarize", MEMO, 150, 100, "default") is None
+
+def test_eviction_removes_the_oldest_entry_and_its_buckets():
+    index = SimilarityIndex(max_entries=2)
+    texts = [MEMO, UNRELATED, "A third, entirely different note about the office printer being out of toner again."]
+    for number, text in enumerate(texts):
+        index.add("scope", text, f"summary {number}")
+    assert index.stats()["entries"] == 2
+    assert index.lookup("scope", MEMO) is None
+    assert index.lookup("scope", texts[2]) == "summary 2"
+
+    live = set(index._entries)
+    assert all(bucket and bucket <= live for bucket in index._buckets.values())
+    assert len(index._buckets) <= 2 * BANDS
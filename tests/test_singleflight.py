@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+import pytest
+from singleflight import SingleFlight, AsyncSingleFlight
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+def run_threads(flight, key, fn, count):
+    """Call flight.do(key, fn) from count threads; return each thread's result or exception."""
+    outcomes = [None] * count
+
+    def call(index):
+        try:
+            outcomes[index] = flight.do(key, fn)
+        except BaseException as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(2)
+        return "result"
+
+    threads, outcomes = run_threads(flight, "key", compute, 5)
+    wait_until(lambda: flight.coalesced == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes == ["result"] * 5
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+def test_leader_exception_reaches_every_waiter():
+    flight = SingleFlight("test")
+    release = threading.Event()
+
+    def compute():
+        release.wait(2)
+        raise ValueError("backend failed")
+
+    threads, outcomes = run_threads(flight, "key", compute, 4)
+    wait_until(lambda: flight.coalesced == 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert flight.in_flight() == 0
+    # The failure is not remembered: the next call runs again
+    assert flight.do("key", lambda: "retried") == "retried"
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+def test_async_leader_exception_reaches_every_waiter():
+    async def scenario():
+        flight = AsyncSingleFlight("test")
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            raise ValueError("backend failed")
+
+        waiters = [asyncio.ensure_future(flight.do("key", compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        outcomes = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+        assert flight.coalesced == 2
+
+    run(scenario())
+
+def test_async_cancelling_one_waiter_leaves_the_others_running():
+    async def scenario():
+        flight = AsyncSingleFlight("test")
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return "result"
+
+        waiters = [asyncio.ensure_future(flight.do("key", compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        waiters[0].cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await waiters[0]
+        assert await asyncio.gather(*waiters[1:]) == ["result", "result"]
+
+    run(scenario())
+
+def test_async_cancelling_the_last_waiter_cancels_the_call():
+    async def scenario():
+        flight = AsyncSingleFlight("test")
+        started = []
+        cancelled = []
+
+        async def compute():
+            started.append(1)
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+            return "stale"
+
+        waiter = asyncio.ensure_future(flight.do("key", compute))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert flight.in_flight() == 0
+
+        # A caller arriving straight after must start a fresh call rather than
+        # join the one that is being cancelled
+        async def fresh():
+            return "fresh"
+
+        assert await flight.do("key", fresh) == "fresh"
+        await asyncio.sleep(0)
+        assert cancelled == [1]
+
+    run(scenario())
@@ -0,0 +1,147 @@
+import threading
+import time
+from types import SimpleNamespace
+import httpx
+import openai
+import pytest
+import summarizer
+from backends import BackendRouter, ExtractiveBackend, RemoteBackend
+from cache import summary_cache
+from ratelimit import BackendLimiter
+from worker import SummaryWorker
+
+TEXT = " ".join(f"Sentence {i} of the report explains how the plan changes next year." for i in range(20))
+
+class FakeStream:
+    def __init__(self, pieces, error=None):
+        self.pieces = pieces
+        self.error = error
+        self.closed = False
+
+    def __iter__(self):
+        for piece in self.pieces:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        self.closed = True
+
+class StreamingClient:
+    """Stands in for the OpenAI client, streaming a fixed list of pieces."""
+
+    def __init__(self, pieces, error=None):
+        self.pieces = pieces
+        self.error = error
+        self.streams = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, stream=False, **options):
+        assert stream
+        self.streams.append(FakeStream(self.pieces, self.error))
+        return self.streams[-1]
+
+@pytest.fixture
+def use_client(monkeypatch):
+    def install(client):
+        remote = RemoteBackend(client_factory=lambda: client, limiter=BackendLimiter(max_retries=0))
+        monkeypatch.setattr(summarizer, "router", BackendRouter(remote=remote, local=ExtractiveBackend(), mode="remote"))
+        return client
+    summary_cache.clear()
+    yield install
+    summary_cache.clear()
+
+PIECES = ["  The plan", " grows", " in three regions", " and trims costs", " across every team this year."]
+
+def test_pieces_arrive_in_order_and_the_result_is_cached(use_client):
+    client = use_client(StreamingClient(PIECES))
+    pieces = list(summarizer.stream_action("summarize", TEXT, min_length=20))
+    assert pieces == ["The plan"] + PIECES[1:]
+    assert client.streams[0].closed
+
+    again = list(summarizer.stream_action("summarize", TEXT, min_length=20))
+    assert again == ["".join(pieces)]
+    assert len(client.streams) == 1
+
+def test_result_failing_validation_is_shown_but_not_cached(use_client):
+    client = use_client(StreamingClient(["Too", " short."]))
+    assert list(summarizer.stream_action("summarize", TEXT, min_length=100)) == ["Too", " short."]
+    list(summarizer.stream_action("summarize", TEXT, min_length=100))
+    assert len(client.streams) == 2
+
+def test_connection_failure_before_output_answers_locally(use_client):
+    request = httpx.Request("POST", "https://api.test/v1/chat/completions")
+    use_client(StreamingClient([], error=openai.APIConnectionError(request=request)))
+    pieces = list(summarizer.stream_action("summarize", TEXT, max_length=30, min_length=20))
+    assert len(pieces) == 1
+    assert 0 < len(pieces[0].split()) <= 30
+
+def test_failure_mid_stream_ends_with_an_error_message(use_client):
+    use_client(StreamingClient(PIECES[:2], error=RuntimeError("connection reset")))
+    pieces = list(summarizer.stream_action("summarize", TEXT, min_length=20))
+    assert pieces[:2] == ["The plan", " grows"]
+    assert pieces[2] == "Unexpected Error: connection reset"
+
+class FakeRoot:
+    """Records after() calls; tests run the worker's drain function themselves."""
+
+    def __init__(self):
+        self.scheduled = 0
+
+    def after(self, ms, fn):
+        self.scheduled += 1
+
+@pytest.fixture
+def worker():
+    worker = SummaryWorker(FakeRoot(), max_workers=2, poll_ms=1)
+    yield worker
+    worker.shutdown()
+
+def drain(worker, until, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not until() and time.monotonic() < deadline:
+        time.sleep(0.005)
+        worker._poll()
+    assert until()
+
+def test_worker_delivers_pieces_in_order_then_done(worker):
+    received, finished = [], []
+    worker.submit(lambda: iter(["a", "b", "c"]), received.append, lambda: finished.append(True))
+    drain(worker, lambda: finished)
+    assert received == ["a", "b", "c"]
+    assert finished == [True]
+    assert not worker.is_busy()
+
+    scheduled = worker.root.scheduled
+    worker._poll()
+    assert worker.root.scheduled == scheduled  # idle: the drain stops rescheduling itself
+
+def gated_stream(gate, pieces, closed):
+    try:
+        for piece in pieces:
+            gate.wait(5)
+            yield piece
+    finally:
+        closed.set()
+
+def test_new_job_supersedes_the_previous_one(worker):
+    gate, first_closed = threading.Event(), threading.Event()
+    old, new, finished = [], [], []
+    worker.submit(lambda: gated_stream(gate, ["old 1", "old 2"], first_closed), old.append, lambda: finished.append("old"))
+    worker.submit(lambda: iter(["new"]), new.append, lambda: finished.append("new"))
+    gate.set()
+    drain(worker, lambda: finished and first_closed.is_set())
+    assert (old, new, finished) == ([], ["new"], ["new"])
+
+def test_cancel_stops_the_job_and_closes_its_stream(worker):
+    gate, closed = threading.Event(), threading.Event()
+    received, finished = [], []
+    worker.submit(lambda: gated_stream(gate, ["1", "2", "3"], closed), received.append, lambda: finished.append(True))
+    assert worker.is_busy()
+    assert worker.cancel()
+    assert not worker.cancel()
+    gate.set()
+    assert closed.wait(5)
+    worker._poll()
+    assert received == [] and finished == []
+    assert not worker.is_busy()
@@ -0,0 +1,89 @@
+import threading
+import pytest
+from sqlalchemy import Boolean, Column, Date, DateTime, Integer, MetaData, String, Table, create_engine
+from usage import UsageLedger
+
+@pytest.fixture
+def ledger(tmp_path):
+    metadata = MetaData()
+    events = Table(
+        "usage_event", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, nullable=False),
+        Column("action", String(32), nullable=False),
+        Column("tokens_in", Integer, nullable=False),
+        Column("tokens_out", Integer, nullable=False),
+        Column("latency_ms", Integer, nullable=False),
+        Column("cache_hit", Boolean, nullable=False),
+        Column("created", DateTime, nullable=False),
+    )
+    daily = Table(
+        "daily_usage", metadata,
+        Column("user_id", Integer, primary_key=True),
+        Column("day", Date, primary_key=True),
+        Column("requests", Integer, nullable=False, default=0),
+        Column("tokens_in", Integer, nullable=False, default=0),
+        Column("tokens_out", Integer, nullable=False, default=0),
+    )
+    engine = create_engine(f"sqlite:///{tmp_path / 'usage.db'}")
+    metadata.create_all(engine)
+    yield UsageLedger(events, daily, lambda: engine)
+    engine.dispose()
+
+def record(ledger, day, user_id=1):
+    ledger.record(user_id, "summarize", tokens_in=10, tokens_out=5, latency_ms=3, cache_hit=False,
+                  reserved_on=day)
+
+def test_reservations_count_before_jobs_finish(ledger):
+    days = [ledger.reserve(1, limit=3) for _ in range(5)]
+    assert days[3:] == [None, None]
+    assert ledger.usage_today(1)["requests"] == 3
+
+def test_recording_settles_the_reservation(ledger):
+    day = ledger.reserve(1, limit=2)
+    record(ledger, day)
+    assert ledger.usage_today(1) == {"requests": 1, "tokens_in": 10, "tokens_out": 5}
+    assert ledger.flush() == 1
+    assert ledger.usage_today(1)["requests"] == 1
+    assert ledger.reserve(1, limit=2) is not None
+    assert ledger.reserve(1, limit=2) is None
+
+def test_released_reservations_free_the_quota(ledger):
+    day = ledger.reserve(1, limit=1)
+    assert ledger.reserve(1, limit=1) is None
+    ledger.release(1, day)
+    assert ledger.usage_today(1)["requests"] == 0
+    assert ledger.reserve(1, limit=1) is not None
+
+def test_no_limit_still_counts(ledger):
+    for _ in range(4):
+        assert ledger.reserve(2) is not None
+    assert ledger.usage_today(2)["requests"] == 4
+    assert ledger.usage_today(1)["requests"] == 0
+
+def test_quota_holds_while_a_flush_is_writing(ledger):
+    for _ in range(3):
+        record(ledger, ledger.reserve(1, limit=3))
+
+    writing = threading.Event()
+    proceed = threading.Event()
+    get_engine = ledger.get_engine
+
+    def slow_engine():
+        writing.set()
+        assert proceed.wait(5)
+        return get_engine()
+
+    ledger.get_engine = slow_engine
+    flusher = threading.Thread(target=ledger.flush)
+    flusher.start()
+    try:
+        assert writing.wait(5)
+        # The buffered rows are out of the buffer but not yet in the stored totals
+        assert ledger.usage_today(1)["requests"] == 3
+        assert ledger.reserve(1, limit=3) is None
+    finally:
+        proceed.set()
+        flusher.join()
+    assert ledger.usage_today(1)["requests"] == 3
+    assert ledger.reserve(1, limit=3) is None
@@ -0,0 +1,83 @@
+import time
+import pytest
+from sqlalchemy import delete, text, update
+from user_cache import UserCache
+
+def test_entries_expire_after_the_ttl():
+    cache = UserCache(ttl=0.05)
+    cache.put(1, {"id": 1})
+    assert cache.get(1) == {"id": 1}
+    time.sleep(0.06)
+    assert cache.get(1) is None
+
+def test_least_recently_used_user_is_dropped():
+    cache = UserCache(max_entries=2)
+    cache.put(1, {"id": 1})
+    cache.put(2, {"id": 2})
+    cache.get(1)
+    cache.put(3, {"id": 3})
+    assert cache.get(2) is None
+    assert cache.get(1) and cache.get(3)
+
+@pytest.fixture
+def member(web, request):
+    """A signed-in test client, its user id, and a helper that loads it through the cache."""
+    name = request.node.name.replace("_", "-")[:60]
+    client = web.app.test_client()
+    form = {"username": name, "email": f"{name}@example.com", "password": "password"}
+    assert client.post("/register", data=form).status_code == 302
+    assert client.post("/login", data={"email": form["email"], "password": "password"}).status_code == 302
+    with web.app.app_context():
+        user_id = web.User.query.filter_by(email=form["email"]).one().id
+
+    def load():
+        with web.app.test_request_context():
+            user = web.load_user(str(user_id))
+            return None if user is None else user.is_premium
+
+    return client, user_id, load
+
+def test_default_ttl_is_short(web):
+    assert web.user_cache.ttl <= 5
+
+def test_orm_update_and_delete_take_effect_at_once(web, member):
+    client, user_id, load = member
+    assert load() is False
+    assert web.user_cache.get(user_id) is not None
+    with web.app.app_context():
+        web.db.session.get(web.User, user_id).is_premium = True
+        web.db.session.commit()
+    assert load() is True
+
+    with web.app.app_context():
+        web.db.session.delete(web.db.session.get(web.User, user_id))
+        web.db.session.commit()
+    assert load() is None
+    assert client.get("/download").status_code == 302  # back to the login page
+
+def test_bulk_update_and_delete_take_effect_at_once(web, member):
+    client, user_id, load = member
+    assert load() is False
+    with web.app.app_context():
+        web.db.session.execute(update(web.User).where(web.User.id == user_id).values(is_premium=True))
+        web.db.session.commit()
+    assert load() is True
+
+    with web.app.app_context():
+        web.db.session.execute(delete(web.User).where(web.User.id == user_id))
+        web.db.session.commit()
+    assert client.get("/download").status_code == 302
+
+def test_changes_from_elsewhere_show_once_the_entry_expires(web, member, monkeypatch):
+    client, user_id, load = member
+    monkeypatch.setattr(web.user_cache, "ttl", 0.05)
+    web.user_cache.invalidate(user_id)
+    assert load() is False
+
+    # Another process changing the row: no ORM events fire here
+    with web.app.app_context():
+        with web.db.engine.begin() as connection:
+            connection.execute(text("UPDATE user SET is_premium = 1 WHERE id = :id"), {"id": user_id})
+    assert load() is False  # still the cached snapshot
+    time.sleep(0.06)
+    assert load() is True
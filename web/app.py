@@ -1,21 +1,86 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, g, Response, jsonify
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import make_transient_to_detached
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from flask_bcrypt import Bcrypt
 import stripe
+import hmac
 import os
+import sys
+import time
+import json
+import datetime
+
+# Shared modules live alongside the desktop client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'desktop'))
+from metrics import metrics
+from jobs import JobQueue, QueueFull, PRIORITY_PREMIUM, PRIORITY_STANDARD
+from passwords import PasswordHasher, HasherBusy
+from user_cache import UserCache
+from database import engine_options, install_sqlite_pragmas, is_sqlite
+from usage import UsageLedger
+from billing import FulfillmentWorker
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your_secret_key')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///ai_summarizer.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///ai_summarizer.db')
+app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', '8'))
+app.config['DB_POOL_TIMEOUT'] = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+    app.config['SQLALCHEMY_DATABASE_URI'],
+    pool_size=app.config['DB_POOL_SIZE'],
+    pool_timeout=app.config['DB_POOL_TIMEOUT'],
+    busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS'],
+)
 app.config['STRIPE_PUBLIC_KEY'] = os.getenv('STRIPE_PUBLIC_KEY')
 app.config['STRIPE_SECRET_KEY'] = os.getenv('STRIPE_SECRET_KEY')
+app.config['STRIPE_WEBHOOK_SECRET'] = os.getenv('STRIPE_WEBHOOK_SECRET')
+app.config['STRIPE_API_BASE'] = os.getenv('STRIPE_API_BASE')  # e.g. the local stand-in in stripe_mock.py
+app.config['STRIPE_TIMEOUT'] = float(os.getenv('STRIPE_TIMEOUT', '10'))
+app.config['STRIPE_MAX_RETRIES'] = int(os.getenv('STRIPE_MAX_RETRIES', '2'))
+app.config['FULFILLMENT_MAX_ATTEMPTS'] = int(os.getenv('FULFILLMENT_MAX_ATTEMPTS', '8'))
+app.config['API_WORKERS'] = int(os.getenv('API_WORKERS', str(min(4, os.cpu_count() or 1))))
+app.config['API_QUEUE_DEPTH'] = int(os.getenv('API_QUEUE_DEPTH', '100'))
+app.config['API_SYNC_MAX_CHARS'] = int(os.getenv('API_SYNC_MAX_CHARS', '4000'))
+app.config['API_SYNC_TIMEOUT'] = float(os.getenv('API_SYNC_TIMEOUT', '30'))
+app.config['API_JOB_RETENTION'] = int(os.getenv('API_JOB_RETENTION', '600'))
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.getenv('BCRYPT_LOG_ROUNDS', '12'))
+app.config['BCRYPT_WORKERS'] = int(os.getenv('BCRYPT_WORKERS', '2'))
+app.config['BCRYPT_MAX_PENDING'] = int(os.getenv('BCRYPT_MAX_PENDING', '32'))
+# Cached users carry is_premium and prove the account exists; changes made by other
+# processes are only seen once the entry expires, so keep this short
+app.config['USER_CACHE_TTL'] = float(os.getenv('USER_CACHE_TTL', '5'))
+app.config['USER_CACHE_SIZE'] = int(os.getenv('USER_CACHE_SIZE', '1024'))
+app.config['USAGE_FLUSH_INTERVAL'] = float(os.getenv('USAGE_FLUSH_INTERVAL', '5'))
+app.config['USAGE_MAX_BUFFER'] = int(os.getenv('USAGE_MAX_BUFFER', '500'))
+app.config['FREE_DAILY_REQUESTS'] = int(os.getenv('FREE_DAILY_REQUESTS', '0'))  # 0 = unlimited
+app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')  # without one, only localhost may read /metrics
 
 stripe.api_key = app.config['STRIPE_SECRET_KEY']
+stripe.max_network_retries = app.config['STRIPE_MAX_RETRIES']
+stripe.default_http_client = stripe.http_client.RequestsClient(timeout=app.config['STRIPE_TIMEOUT'])
+if app.config['STRIPE_API_BASE']:
+    stripe.api_base = app.config['STRIPE_API_BASE']
 db = SQLAlchemy(app)
-bcrypt = Bcrypt(app)
+if is_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+    with app.app_context():
+        install_sqlite_pragmas(
+            db.engine,
+            busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS'],
+            synchronous=app.config['SQLITE_SYNCHRONOUS'],
+        )
+hasher = PasswordHasher(
+    rounds=app.config['BCRYPT_LOG_ROUNDS'],
+    workers=app.config['BCRYPT_WORKERS'],
+    max_pending=app.config['BCRYPT_MAX_PENDING'],
+)
+user_cache = UserCache(ttl=app.config['USER_CACHE_TTL'], max_entries=app.config['USER_CACHE_SIZE'])
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
+API_ACTIONS = ('summarize', 'paraphrase', 'code_summarize')
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -24,9 +89,182 @@ class User(UserMixin, db.Model):
     password = db.Column(db.String(255), nullable=False)
     is_premium = db.Column(db.Boolean, default=False)
 
+# Columns the user loader caches; the password hash stays in the database
+CACHED_USER_COLUMNS = ('id', 'username', 'email', 'is_premium')
+
+class UsageEvent(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    action = db.Column(db.String(32), nullable=False)
+    tokens_in = db.Column(db.Integer, nullable=False)
+    tokens_out = db.Column(db.Integer, nullable=False)
+    latency_ms = db.Column(db.Integer, nullable=False)
+    cache_hit = db.Column(db.Boolean, nullable=False)
+    created = db.Column(db.DateTime, nullable=False)
+
+class DailyUsage(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    requests = db.Column(db.Integer, nullable=False, default=0)
+    tokens_in = db.Column(db.Integer, nullable=False, default=0)
+    tokens_out = db.Column(db.Integer, nullable=False, default=0)
+
+class StripeEvent(db.Model):
+    id = db.Column(db.String(255), primary_key=True)  # Stripe's event id, so redeliveries collide
+    type = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, processed, ignored, failed
+    received = db.Column(db.DateTime, nullable=False)
+    processed = db.Column(db.DateTime)
+
+def usage_engine():
+    with app.app_context():
+        return db.engine
+
+usage_ledger = UsageLedger(
+    UsageEvent.__table__,
+    DailyUsage.__table__,
+    usage_engine,
+    flush_interval=app.config['USAGE_FLUSH_INTERVAL'],
+    max_buffer=app.config['USAGE_MAX_BUFFER'],
+)
+
+def record_usage(job):
+    if job.owner is None:
+        return
+    if job.usage is None:
+        # Failed jobs do not count against the quota
+        if job.reservation is not None:
+            usage_ledger.release(job.owner, job.reservation)
+        return
+    usage_ledger.start()
+    usage_ledger.record(job.owner, job.action, reserved_on=job.reservation, **job.usage)
+
+job_queue = JobQueue(
+    workers=app.config['API_WORKERS'],
+    max_depth=app.config['API_QUEUE_DEPTH'],
+    retention=app.config['API_JOB_RETENTION'],
+    on_complete=record_usage,
+)
+
+FULFILLED_EVENTS = ('checkout.session.completed', 'checkout.session.async_payment_succeeded')
+
+def checkout_user(session):
+    """Return the user a checkout session was created for, or None if it names no known user."""
+    try:
+        user_id = int(session.get('client_reference_id'))
+    except (TypeError, ValueError):
+        return None  # Sessions created outside this app carry no reference
+    return db.session.get(User, user_id)
+
+def fulfill_stripe_event(event_id):
+    with app.app_context():
+        stored = db.session.get(StripeEvent, event_id)
+        if stored is None or stored.status != 'pending':
+            return  # Already handled; Stripe delivers events at least once
+        
+        session = json.loads(stored.payload)['data']['object']
+        user = None
+        if stored.type in FULFILLED_EVENTS and session.get('payment_status') == 'paid':
+            user = checkout_user(session)
+            if user is None:
+                # Retrying cannot help: the session was made elsewhere or its account is gone
+                metrics.inc('stripe_unmatched_sessions')
+        if user is not None:
+            user.is_premium = True
+            stored.status = 'processed'
+        else:
+            stored.status = 'ignored'
+        
+        # The upgrade and the event's status commit together, so a retry never upgrades twice
+        stored.processed = datetime.datetime.utcnow()
+        db.session.commit()
+
+def mark_stripe_event_failed(event_id, error):
+    with app.app_context():
+        stored = db.session.get(StripeEvent, event_id)
+        if stored is not None and stored.status == 'pending':
+            stored.status = 'failed'
+            db.session.commit()
+
+fulfillment = FulfillmentWorker(
+    fulfill_stripe_event,
+    on_give_up=mark_stripe_event_failed,
+    max_attempts=app.config['FULFILLMENT_MAX_ATTEMPTS'],
+)
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_user(mapper, connection, target):
+    # Premium status and credentials must take effect on the next request
+    user_cache.invalidate(target.id)
+
+@event.listens_for(db.session, 'do_orm_execute')
+def invalidate_bulk_user_changes(orm_execute_state):
+    # Bulk UPDATE/DELETE statements skip the per-object events above and do not
+    # say which rows they touched, so drop every cached user
+    if ((orm_execute_state.is_update or orm_execute_state.is_delete)
+            and orm_execute_state.bind_mapper is User.__mapper__):
+        user_cache.clear()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+_fulfillment_resumed = False
+
+@app.before_request
+def resume_fulfillment():
+    # Events left pending by a previous process are picked up once per process
+    global _fulfillment_resumed
+    if _fulfillment_resumed:
+        return
+    _fulfillment_resumed = True
+    try:
+        pending = db.session.query(StripeEvent.id).filter_by(status='pending').all()
+    except SQLAlchemyError:
+        db.session.rollback()  # Tables not created yet; nothing can be pending
+        return
+    for (event_id,) in pending:
+        fulfillment.submit(event_id)
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.endpoint or 'unknown'
+        metrics.observe('http_request', time.perf_counter() - started, endpoint=endpoint)
+        metrics.inc('http_responses', endpoint=endpoint, status=response.status_code)
+    return response
+
+def metrics_allowed():
+    token = app.config['METRICS_TOKEN']
+    if token:
+        return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+@app.route('/metrics')
+def metrics_endpoint():
+    # Route and usage counters are not for the public
+    if not metrics_allowed():
+        return Response('Forbidden\n', status=403, mimetype='text/plain')
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    values = user_cache.get(user_id)
+    if values is None:
+        with metrics.span('user_lookup', source='loader'):
+            user = db.session.get(User, user_id)
+        if user is not None:
+            user_cache.put(user_id, {column: getattr(user, column) for column in CACHED_USER_COLUMNS})
+        return user
+    
+    # Attach a snapshot to the session without a SELECT; uncached columns load on access
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
 
 @app.route('/')
 def index():
@@ -39,11 +277,22 @@ def register():
         email = request.form['email']
         password = request.form['password']
         
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+        try:
+            with metrics.span('password_hash'):
+                hashed_password = hasher.hash(password)
+        except HasherBusy as e:
+            flash(str(e), 'danger')
+            return render_template('register.html'), 503
         new_user = User(username=username, email=email, password=hashed_password)
         
+        # The unique indexes on username and email reject duplicates without a lookup first
         db.session.add(new_user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash('That username or email is already registered.', 'danger')
+            return render_template('register.html'), 409
         
         flash('Registration successful!', 'success')
         return redirect(url_for('login'))
@@ -56,9 +305,23 @@ def login():
         email = request.form['email']
         password = request.form['password']
         
-        user = User.query.filter_by(email=email).first()
+        with metrics.span('user_lookup'):
+            user = User.query.filter_by(email=email).first()
+        
+        try:
+            with metrics.span('password_check'):
+                valid = user is not None and hasher.check(user.password, password)
+            
+            # Upgrade hashes made with an older work factor while the plain password is at hand
+            if valid and hasher.needs_rehash(user.password):
+                with metrics.span('password_hash'):
+                    user.password = hasher.hash(password)
+                db.session.commit()
+        except HasherBusy as e:
+            flash(str(e), 'danger')
+            return render_template('login.html'), 503
         
-        if user and bcrypt.check_password_hash(user.password, password):
+        if valid:
             login_user(user)
             flash('Login successful!', 'success')
             return redirect(url_for('download'))
@@ -72,31 +335,171 @@ def login():
 def download():
     return render_template('download.html')
 
-# In your Flask route
-import stripe
-
-stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
+@app.route('/download/app')
+@login_required
+def download_app():
+    return render_template('download_links.html')
 
 @app.route('/create-checkout-session', methods=['POST'])
+@login_required
 def create_checkout_session():
-    session = stripe.checkout.Session.create(
-        payment_method_types=['card'],
-        line_items=[{
-            'price_data': {
-                'currency': 'usd',
-                'unit_amount': 999,  # $9.99
-                'product_data': {
-                    'name': 'AI Summarizer Premium',
-                },
-            },
-            'quantity': 1,
-        }],
-        mode='payment',
-        success_url=url_for('download', _external=True),
-        cancel_url=url_for('index', _external=True),
-    )
+    try:
+        with metrics.span('stripe_checkout_create'):
+            session = stripe.checkout.Session.create(
+                payment_method_types=['card'],
+                line_items=[{
+                    'price_data': {
+                        'currency': 'usd',
+                        'unit_amount': 999,  # $9.99
+                        'product_data': {
+                            'name': 'AI Summarizer Premium',
+                        },
+                    },
+                    'quantity': 1,
+                }],
+                mode='payment',
+                # Lets the webhook find the user to upgrade
+                client_reference_id=str(current_user.id),
+                customer_email=current_user.email,
+                success_url=url_for('download', _external=True),
+                cancel_url=url_for('index', _external=True),
+            )
+    except stripe.error.StripeError:
+        metrics.inc('stripe_checkout_errors')
+        flash('Payment service is unavailable, please try again.', 'danger')
+        return redirect(url_for('download'))
     return redirect(session.url, code=303)
 
+@app.route('/stripe/webhook', methods=['POST'])
+def stripe_webhook():
+    payload = request.get_data()
+    try:
+        stripe_event = stripe.Webhook.construct_event(
+            payload, request.headers.get('Stripe-Signature'), app.config['STRIPE_WEBHOOK_SECRET']
+        )
+    except (ValueError, stripe.error.SignatureVerificationError):
+        metrics.inc('stripe_webhook_events', result='invalid')
+        return jsonify(error='Invalid payload or signature.'), 400
+    
+    # Record the event and acknowledge; fulfillment happens on the background worker
+    db.session.add(StripeEvent(
+        id=stripe_event['id'],
+        type=stripe_event['type'],
+        payload=payload.decode('utf-8'),
+        received=datetime.datetime.utcnow(),
+    ))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        metrics.inc('stripe_webhook_events', result='duplicate')
+        return jsonify(received=True)
+    
+    fulfillment.submit(stripe_event['id'])
+    metrics.inc('stripe_webhook_events', result='queued', type=stripe_event['type'])
+    return jsonify(received=True)
+
+def _job_response(job):
+    if job.status == 'done':
+        return jsonify(job.to_dict())
+    if job.status == 'error':
+        return jsonify(job.to_dict()), 400 if job.client_error else 502
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers['Location'] = url_for('job_status', job_id=job.id)
+    return response
+
+def _owned_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None or job.owner != current_user.id:
+        return None
+    return job
+
+@app.route('/api/summarize', methods=['POST'])
+@login_required
+def api_summarize():
+    data = request.get_json(silent=True) or {}
+    action = data.get('action', 'summarize')
+    text = data.get('text')
+    if action not in API_ACTIONS:
+        return jsonify(error=f"Unknown action: {action}"), 400
+    if not isinstance(text, str) or not text.strip():
+        return jsonify(error="No text provided."), 400
+    try:
+        settings = {
+            'max_length': int(data.get('max_length', 150)),
+            'min_length': int(data.get('min_length', 100)),
+            'style': data.get('style', 'default'),
+            'language': data.get('language'),
+        }
+    except (TypeError, ValueError):
+        return jsonify(error="max_length and min_length must be integers."), 400
+
+    # Counted now rather than on completion, so parallel async requests cannot overrun the quota
+    limit = 0 if current_user.is_premium else app.config['FREE_DAILY_REQUESTS']
+    reservation = usage_ledger.reserve(current_user.id, limit)
+    if reservation is None:
+        metrics.inc('api_rejected', reason='quota')
+        return jsonify(error="Daily summarization limit reached. Upgrade to premium for unlimited use."), 429
+
+    priority = PRIORITY_PREMIUM if current_user.is_premium else PRIORITY_STANDARD
+    try:
+        job = job_queue.submit(action, text, settings, priority=priority, owner=current_user.id,
+                               reservation=reservation)
+    except QueueFull as e:
+        usage_ledger.release(current_user.id, reservation)
+        metrics.inc('api_rejected', reason='queue_full')
+        return jsonify(error=str(e)), 503, {'Retry-After': '5'}
+    metrics.inc('api_jobs', action=action, priority=priority)
+
+    # Small inputs are answered inline; large ones (or slow small ones) are polled
+    wait = data.get('async') is not True and len(text) <= app.config['API_SYNC_MAX_CHARS']
+    if wait:
+        job.done.wait(app.config['API_SYNC_TIMEOUT'])
+    return _job_response(job)
+
+@app.route('/api/usage')
+@login_required
+def api_usage():
+    limit = app.config['FREE_DAILY_REQUESTS']
+    return jsonify(
+        today=usage_ledger.usage_today(current_user.id),
+        daily_limit=None if current_user.is_premium or not limit else limit,
+    )
+
+@app.route('/api/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    job = _owned_job(job_id)
+    if job is None:
+        return jsonify(error="Job not found."), 404
+    return _job_response(job)
+
+@app.route('/api/jobs/<job_id>/events')
+@login_required
+def job_events(job_id):
+    job = _owned_job(job_id)
+    if job is None:
+        return jsonify(error="Job not found."), 404
+
+    def events():
+        status = None
+        idle = 0
+        while True:
+            if job.status != status:
+                status = job.status
+                idle = 0
+                yield f"event: {status}\ndata: {json.dumps(job.to_dict())}\n\n"
+            if job.done.is_set():
+                return
+            job.done.wait(1)
+            idle += 1
+            # Comment lines keep proxies from closing an idle stream
+            if idle % 15 == 0:
+                yield ": keep-alive\n\n"
+
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
 @app.route('/logout')
 @login_required
 def logout():
@@ -0,0 +1,79 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+import traceback
+from metrics import metrics
+
+class FulfillmentWorker:
+    """
+    Processes stored payment events on a background thread, with retries.
+
+    Webhook requests only record the event and hand its id to submit(),
+    so the request thread never waits on fulfillment. handler(event_id)
+    must be idempotent: it returns normally once the event is handled
+    and raises to have it retried with exponential backoff, up to
+    max_attempts tries, after which on_give_up(event_id, error) is called.
+    """
+
+    def __init__(self, handler, on_give_up=None, max_attempts=5, base_delay=2.0, max_delay=300.0):
+        self.handler = handler
+        self.on_give_up = on_give_up
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._ready = []  # heap of (ready_at, sequence, event_id, attempt)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stripe-fulfillment", daemon=True)
+                self._thread.start()
+
+    def submit(self, event_id, delay=0.0, attempt=1):
+        """Schedule an event for processing after delay seconds."""
+        self.start()
+        with self._condition:
+            heapq.heappush(self._ready, (time.monotonic() + delay, next(self._sequence), event_id, attempt))
+            self._condition.notify()
+
+    def pending(self):
+        with self._condition:
+            return len(self._ready)
+
+    def _next(self):
+        with self._condition:
+            while True:
+                if self._ready:
+                    wait = self._ready[0][0] - time.monotonic()
+                    if wait <= 0:
+                        _, _, event_id, attempt = heapq.heappop(self._ready)
+                        return event_id, attempt
+                    self._condition.wait(wait)
+                else:
+                    self._condition.wait()
+
+    def _run(self):
+        while True:
+            event_id, attempt = self._next()
+            try:
+                with metrics.span("stripe_fulfillment"):
+                    self.handler(event_id)
+                metrics.inc("stripe_fulfillments", result="ok")
+            except Exception as e:
+                traceback.print_exc()
+                if attempt >= self.max_attempts:
+                    metrics.inc("stripe_fulfillments", result="failed")
+                    if self.on_give_up is not None:
+                        try:
+                            self.on_give_up(event_id, e)
+                        except Exception:
+                            traceback.print_exc()
+                    continue
+                metrics.inc("stripe_fulfillments", result="retry")
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+                self.submit(event_id, delay=random.uniform(delay / 2, delay), attempt=attempt + 1)
@@ -0,0 +1,59 @@
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+def is_sqlite(uri):
+    return uri.startswith("sqlite")
+
+def engine_options(uri, pool_size=8, pool_timeout=30, busy_timeout_ms=5000):
+    """
+    Builds SQLALCHEMY_ENGINE_OPTIONS for the configured database.
+
+    Args:
+        uri (str): SQLAlchemy database URI
+        pool_size (int): Connections per process, sized to the web worker's thread count
+        pool_timeout (int): Seconds to wait for a free pooled connection
+        busy_timeout_ms (int): How long SQLite waits on a locked database before failing
+
+    Returns:
+        dict: Keyword arguments for create_engine
+    """
+    if is_sqlite(uri):
+        if uri in ("sqlite://", "sqlite:///:memory:"):
+            return {}  # one shared in-memory connection; nothing to pool
+        return {
+            "connect_args": {"timeout": busy_timeout_ms / 1000, "check_same_thread": False},
+            # SQLAlchemy 1.4 defaults file databases to NullPool, which takes no pool sizing
+            "poolclass": QueuePool,
+            "pool_size": pool_size,
+            "max_overflow": 0,
+            "pool_timeout": pool_timeout,
+        }
+    return {
+        "pool_size": pool_size,
+        "max_overflow": pool_size,
+        "pool_timeout": pool_timeout,
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+    }
+
+def install_sqlite_pragmas(engine, busy_timeout_ms=5000, synchronous="NORMAL"):
+    """
+    Configures every new SQLite connection for concurrent web workers.
+
+    WAL lets readers proceed while one writer commits, busy_timeout makes
+    writers queue instead of failing with "database is locked", and
+    synchronous=NORMAL is durable under WAL without an fsync per commit.
+    """
+    synchronous = synchronous.upper()
+    if synchronous not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"Invalid SQLite synchronous level: {synchronous}")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA synchronous={synchronous}")
+        cursor.close()
@@ -0,0 +1,252 @@
+import hashlib
+import itertools
+import json
+import queue
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from metrics import metrics
+
+PRIORITY_PREMIUM = 0
+PRIORITY_STANDARD = 1
+MAX_ATTEMPTS = 2  # runs per job when its worker process dies; a job that keeps killing workers fails
+
+class QueueFull(Exception):
+    """Raised when the job queue is at its configured depth."""
+    pass
+
+def run_summarizer_job(action, text, settings):
+    """
+    Runs one summarization inside a worker process.
+
+    Errors are returned rather than raised so they cross the process
+    boundary as plain data.
+    """
+    # Imported in the worker so the web process itself never needs the OpenAI config
+    from summarizer import run_action, served_from_cache, SummarizerError
+    from prompts import count_tokens
+    try:
+        started = time.perf_counter()
+        result = run_action(action, text, **settings)
+        usage = {
+            "tokens_in": count_tokens(text),
+            "tokens_out": count_tokens(result),
+            "latency_ms": int((time.perf_counter() - started) * 1000),
+            "cache_hit": served_from_cache(),
+        }
+        return {"ok": True, "result": result, "usage": usage}
+    except SummarizerError as e:
+        return {"ok": False, "error": str(e), "client_error": True}
+    except Exception as e:
+        traceback.print_exc()
+        return {"ok": False, "error": str(e), "client_error": False}
+
+def job_key(action, text, settings):
+    """Identity of a job's work, shared by requests that would produce the same result."""
+    digest = hashlib.sha256(json.dumps([action, settings], sort_keys=True, default=str).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(" ".join(text.split()).encode("utf-8"))
+    return digest.hexdigest()
+
+class Job:
+    def __init__(self, priority, action, text, settings, owner=None, reservation=None):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.reservation = reservation  # quota reservation held until on_complete settles it
+        self.priority = priority
+        self.action = action
+        self.text = text
+        self.settings = settings
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.client_error = False
+        self.usage = None
+        self.created = time.time()
+        self.finished = None
+        self.done = threading.Event()
+        self.key = None
+        self.followers = []
+        self.attempts = 0
+
+    def to_dict(self):
+        data = {"id": self.id, "status": self.status, "action": self.action}
+        if self.status == "done":
+            data["result"] = self.result
+        elif self.status == "error":
+            data["error"] = self.error
+        return data
+
+class JobQueue:
+    """
+    Priority job queue in front of a pool of summarizer worker processes.
+
+    Jobs wait in a priority queue until a worker slot frees up, so premium
+    jobs overtake standard ones instead of queueing behind them FIFO
+    inside the process pool. A job identical to one already queued or
+    running follows it instead of being queued again.
+    """
+
+    def __init__(self, workers=2, max_depth=100, retention=600, job_fn=run_summarizer_job, on_complete=None):
+        self.workers = workers
+        self.on_complete = on_complete
+        self.max_depth = max_depth
+        self.retention = retention
+        self.job_fn = job_fn
+        self._pending = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._jobs = {}
+        self._leaders = {}
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(workers)
+        self._executor = None
+        self._dispatcher = None
+
+    def _start(self):
+        # Started lazily so importing the app (e.g. gunicorn --preload) does not fork workers
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._dispatcher = threading.Thread(target=self._dispatch, name="job-dispatcher", daemon=True)
+                self._dispatcher.start()
+
+    @property
+    def depth(self):
+        return self._pending.qsize()
+
+    def submit(self, action, text, settings, priority=PRIORITY_STANDARD, owner=None, reservation=None):
+        """
+        Queues a summarization job.
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            QueueFull: If max_depth jobs are already waiting
+        """
+        job = Job(priority, action, text, settings, owner, reservation)
+        job.key = key = job_key(action, text, settings)
+        with self._lock:
+            leader = self._leaders.get(key)
+            if leader is not None:
+                job.text = None
+                job.status = leader.status
+                leader.followers.append(job)
+                self._jobs[job.id] = job
+                return job
+            if self._pending.qsize() >= self.max_depth:
+                raise QueueFull("Summarization queue is full, try again shortly.")
+            self._leaders[key] = job
+            self._jobs[job.id] = job
+        self._start()
+        self._pending.put((priority, next(self._sequence), job))
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _dispatch(self):
+        while True:
+            self._slots.acquire()
+            _, _, job = self._pending.get()
+            with self._lock:
+                for running in [job] + job.followers:
+                    running.status = "running"
+            job.attempts += 1
+            executor = self._executor
+            try:
+                try:
+                    future = executor.submit(self.job_fn, job.action, job.text, job.settings)
+                except BrokenProcessPool:
+                    executor = self._replace_executor(executor)
+                    future = executor.submit(self.job_fn, job.action, job.text, job.settings)
+            except Exception as e:
+                self._finish(job, {"ok": False, "error": str(e), "client_error": False})
+                continue
+            future.add_done_callback(lambda f, job=job, executor=executor: self._on_done(job, executor, f))
+
+    def _replace_executor(self, broken):
+        """
+        Swaps a pool whose worker died for a fresh one.
+
+        A ProcessPoolExecutor is unusable once any of its processes exits
+        unexpectedly (OOM kill, segfault); without this every later job
+        would fail until the server restarts.
+        """
+        with self._lock:
+            if self._executor is broken:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                metrics.inc("job_pool_restarts")
+            executor = self._executor
+        try:
+            broken.shutdown(wait=False)
+        except Exception:
+            traceback.print_exc()
+        return executor
+
+    def _on_done(self, job, executor, future):
+        try:
+            outcome = future.result()
+        except BrokenProcessPool:
+            self._replace_executor(executor)
+            if job.attempts < MAX_ATTEMPTS:
+                # Jobs that were running alongside the crash are innocent; run them again
+                self._requeue(job)
+                return
+            outcome = {"ok": False, "error": "Summarization worker stopped unexpectedly.", "client_error": False}
+        except Exception as e:  # worker crashed
+            outcome = {"ok": False, "error": str(e), "client_error": False}
+        self._finish(job, outcome)
+
+    def _requeue(self, job):
+        with self._lock:
+            for waiting in [job] + job.followers:
+                waiting.status = "queued"
+        self._slots.release()
+        self._pending.put((job.priority, next(self._sequence), job))
+
+    def _finish(self, job, outcome):
+        self._slots.release()
+        with self._lock:
+            self._leaders.pop(job.key, None)
+            followers = job.followers
+        self._complete(job, outcome)
+        if followers and outcome.get("usage"):
+            # Followers shared the leader's call, so for them it was as good as a cache hit
+            outcome = dict(outcome, usage=dict(outcome["usage"], cache_hit=True))
+        for follower in followers:
+            self._complete(follower, outcome)
+        self._prune()
+
+    def _complete(self, job, outcome):
+        if outcome["ok"]:
+            job.usage = outcome.get("usage")
+            job.result = outcome["result"]
+            job.status = "done"
+        else:
+            job.error = outcome["error"]
+            job.client_error = outcome["client_error"]
+            job.status = "error"
+        job.text = None  # the input is no longer needed
+        job.finished = time.time()
+        if self.on_complete is not None:
+            try:
+                self.on_complete(job)
+            except Exception:
+                traceback.print_exc()
+        job.done.set()
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
@@ -0,0 +1,192 @@
+"""
+Load tests for the web app against a throwaway SQLite database.
+
+Usage:
+    python load_test.py [--storm 32] [--seconds 5] [--inline]
+    python load_test.py --scenario register [--processes 4] [--registrations 50]
+
+The login scenario serves the app from a threaded local server, measures
+the latency of an unrelated page on its own, then again while --storm
+threads hammer POST /login. With --inline, bcrypt runs on the request
+thread as it used to, for comparison.
+
+The register scenario runs --processes processes, like gunicorn workers,
+that each register users as fast as they can, and reports any "database
+is locked" errors along with the query plans of the login lookups.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize_latencies(latencies):
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+def probe(url, seconds, interval=0.02):
+    """GET url repeatedly for seconds and return each request's latency."""
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        with urllib.request.urlopen(url) as response:
+            response.read()
+        latencies.append(time.perf_counter() - started)
+        time.sleep(interval)
+    return latencies
+
+def login_storm(url, email, password, threads, stop):
+    """POST /login from many threads until stop is set; return the login latencies."""
+    body = urllib.parse.urlencode({"email": email, "password": password}).encode("utf-8")
+    latencies = []
+    lock = threading.Lock()
+
+    def run():
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, data=body) as response:
+                    response.read()
+            except urllib.error.HTTPError:
+                pass  # 503 from a full hash queue still counts as handled
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    workers = [threading.Thread(target=run, daemon=True) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    return workers, latencies
+
+def register_worker(worker_id, registrations, barrier):
+    """Register users through the app in this process; return status counts."""
+    import app as web
+
+    web.app.config["PROPAGATE_EXCEPTIONS"] = True
+    client = web.app.test_client()
+    counts = {"ok": 0, "locked": 0, "other_errors": 0}
+    barrier.wait()
+    for index in range(registrations):
+        name = f"user-{worker_id}-{index}"
+        form = {"username": name, "email": f"{name}@example.com", "password": "password"}
+        try:
+            response = client.post("/register", data=form)
+            counts["ok" if response.status_code == 302 else "other_errors"] += 1
+        except Exception as e:
+            counts["locked" if "database is locked" in str(e) else "other_errors"] += 1
+    web.hasher.shutdown()
+    return counts
+
+def run_register_scenario(processes, registrations):
+    # Cheap hashes keep the database, not bcrypt, as the contended resource
+    os.environ["BCRYPT_LOG_ROUNDS"] = "4"
+    import app as web
+    web.initialize_database()
+
+    with web.app.app_context():
+        plans = {
+            column: [
+                row[-1] for row in web.db.session.execute(
+                    web.db.text(f"EXPLAIN QUERY PLAN SELECT id FROM user WHERE {column} = :value"),
+                    {"value": "x"},
+                )
+            ]
+            for column in ("email", "username")
+        }
+        web.db.engine.dispose()  # do not hand pooled connections to forked workers
+
+    manager = multiprocessing.Manager()
+    barrier = manager.Barrier(processes)
+    started = time.perf_counter()
+    # Not multiprocessing.Pool: its daemonic workers could not start the bcrypt pool
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = list(executor.map(register_worker, range(processes), [registrations] * processes, [barrier] * processes))
+    elapsed = time.perf_counter() - started
+
+    totals = {key: sum(result[key] for result in results) for key in results[0]}
+    return {
+        "processes": processes,
+        "registrations": processes * registrations,
+        "seconds": round(elapsed, 3),
+        "registrations_per_second": round(processes * registrations / elapsed, 1),
+        **totals,
+        "query_plans": plans,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure page latency during a login storm.")
+    parser.add_argument("--storm", type=int, default=32, help="concurrent login threads")
+    parser.add_argument("--seconds", type=float, default=5.0, help="length of each phase")
+    parser.add_argument("--inline", action="store_true", help="hash on the request thread instead of the pool")
+    parser.add_argument("--scenario", default="login", choices=["login", "register"])
+    parser.add_argument("--processes", type=int, default=4, help="worker processes for the register scenario")
+    parser.add_argument("--registrations", type=int, default=50, help="registrations per process")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="shortify-load-")
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "load_test.db")
+
+    if args.scenario == "register":
+        result = run_register_scenario(args.processes, args.registrations)
+        print(json.dumps(result, indent=2))
+        return 1 if result["locked"] else 0
+
+    from werkzeug.serving import make_server
+    import app as web
+
+    if args.inline:
+        # Bypass the pool to reproduce the old blocking behaviour
+        web.hasher._submit = lambda fn, *fn_args: fn(*fn_args)
+
+    email, password = "load@example.com", "correct horse battery staple"
+    with web.app.app_context():
+        web.db.create_all()
+        web.db.session.add(web.User(username="load", email=email, password=web.hasher.hash(password)))
+        web.db.session.commit()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, web.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    quiet = probe(base + "/", args.seconds)
+
+    stop = threading.Event()
+    workers, logins = login_storm(base + "/login", email, password, args.storm, stop)
+    loaded = probe(base + "/", args.seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+
+    server.shutdown()
+    web.hasher.shutdown()
+
+    print(json.dumps({
+        "mode": "inline" if args.inline else "pool",
+        "storm_threads": args.storm,
+        "index_quiet": summarize_latencies(quiet),
+        "index_during_storm": summarize_latencies(loaded),
+        "logins": summarize_latencies(logins),
+    }, indent=2))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+
+class HasherBusy(Exception):
+    """Raised when too many hash operations are already waiting for the pool."""
+    pass
+
+def _hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+def _check_password(hashed, password):
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+    except ValueError:  # not a bcrypt hash
+        return False
+
+def hash_rounds(hashed):
+    """Return the work factor encoded in a bcrypt hash, e.g. 12 for "$2b$12$..."."""
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small process pool instead of the request thread.
+
+    Hashing is CPU-bound for hundreds of milliseconds, so a login burst
+    would otherwise occupy every web worker. The pool caps how many
+    cores hashing can take, and max_pending caps how many requests may
+    wait for it before callers get HasherBusy.
+    """
+
+    def __init__(self, rounds=12, workers=2, max_pending=32, timeout=10.0):
+        self.rounds = rounds
+        self.workers = workers
+        self.timeout = timeout
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _submit(self, fn, *args):
+        if not self._pending.acquire(timeout=self.timeout):
+            raise HasherBusy("Too many sign-ins in progress, try again shortly.")
+        try:
+            with self._lock:
+                # Created on first use so importing the app does not fork
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                executor = self._executor
+            try:
+                return executor.submit(fn, *args).result()
+            except BrokenProcessPool:
+                # A killed worker breaks the whole pool; without a new one every later login fails
+                return self._replace_executor(executor).submit(fn, *args).result()
+        finally:
+            self._pending.release()
+
+    def _replace_executor(self, broken):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            executor = self._executor
+        broken.shutdown(wait=False)
+        return executor
+
+    def hash(self, password):
+        """Return a bcrypt hash of password at the configured work factor."""
+        return self._submit(_hash_password, password, self.rounds)
+
+    def check(self, hashed, password):
+        """Return True if password matches hashed."""
+        return self._submit(_check_password, hashed, password)
+
+    def needs_rehash(self, hashed):
+        """True if hashed was made with a different work factor than the current one."""
+        return hash_rounds(hashed) != self.rounds
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
@@ -0,0 +1,129 @@
+"""
+Local stand-in for the parts of the Stripe API the web app uses, for tests and load runs.
+
+Usage:
+    python stripe_mock.py [--port 12111] [--latency-ms 300]
+
+Point the app at it with STRIPE_API_BASE=http://127.0.0.1:12111 and any
+STRIPE_SECRET_KEY. Checkout sessions it creates are kept in memory;
+signed_webhook() builds the signed request Stripe would send when one
+of them is paid.
+"""
+import argparse
+import hashlib
+import hmac
+import itertools
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StripeMockState:
+    """Sessions created so far and the latency applied to every request."""
+
+    def __init__(self, latency_ms=300):
+        self.latency = latency_ms / 1000.0
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.requests = 0
+        self._ids = itertools.count(1)
+
+    def create_session(self, params):
+        with self.lock:
+            self.requests += 1
+            session_id = f"cs_test_{next(self._ids):08d}"
+            session = {
+                "id": session_id,
+                "object": "checkout.session",
+                "url": f"https://checkout.stripe.test/pay/{session_id}",
+                "mode": params.get("mode", "payment"),
+                "payment_status": "unpaid",
+                "status": "open",
+                "client_reference_id": params.get("client_reference_id"),
+                "amount_total": int(params.get("line_items[0][price_data][unit_amount]", 0)),
+                "currency": params.get("line_items[0][price_data][currency]", "usd"),
+                "metadata": {
+                    key[len("metadata["):-1]: value
+                    for key, value in params.items() if key.startswith("metadata[")
+                },
+            }
+            self.sessions[session_id] = session
+            return session
+
+class StripeMockHandler(BaseHTTPRequestHandler):
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        params = dict(urllib.parse.parse_qsl(self.rfile.read(length).decode("utf-8")))
+        time.sleep(self.state.latency)
+        if self.path.rstrip("/") == "/v1/checkout/sessions":
+            self._send_json(200, self.state.create_session(params))
+        else:
+            self._send_json(404, {"error": {"type": "invalid_request_error", "message": "Unrecognized request URL"}})
+
+def paid_event(session, event_id=None):
+    """Return the checkout.session.completed event Stripe sends once session is paid."""
+    paid = dict(session, payment_status="paid", status="complete")
+    return {
+        "id": event_id or "evt_" + session["id"],
+        "object": "event",
+        "type": "checkout.session.completed",
+        "created": int(time.time()),
+        "data": {"object": paid},
+    }
+
+def signed_webhook(event, secret, timestamp=None):
+    """
+    Signs an event the way Stripe does.
+
+    Returns:
+        tuple: (payload bytes, Stripe-Signature header value)
+    """
+    payload = json.dumps(event).encode("utf-8")
+    timestamp = int(timestamp if timestamp is not None else time.time())
+    signed = f"{timestamp}.".encode("utf-8") + payload
+    signature = hmac.new(secret.encode("utf-8"), signed, hashlib.sha256).hexdigest()
+    return payload, f"t={timestamp},v1={signature}"
+
+def start_stripe_mock(port=0, **settings):
+    """
+    Starts the stand-in on a background thread.
+
+    Returns:
+        tuple: (server, state, base URL to use as STRIPE_API_BASE)
+    """
+    state = StripeMockState(**settings)
+    handler = type("BoundStripeMockHandler", (StripeMockHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Stripe API stand-in.")
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    server, state, url = start_stripe_mock(args.port, latency_ms=args.latency_ms)
+    print(f"Stripe stand-in listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
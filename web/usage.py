@@ -0,0 +1,210 @@
+import atexit
+import datetime
+import threading
+import time
+import traceback
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from metrics import metrics
+
+COUNTER_FIELDS = ("requests", "tokens_in", "tokens_out")
+
+def _today():
+    return datetime.date.today()
+
+def _upsert(dialect_name, table):
+    if dialect_name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+class UsageLedger:
+    """
+    Buffers usage records in memory and writes them to the database in bulk.
+
+    Each summarization becomes one row in the events table, but rows are
+    only written every flush_interval seconds (or when max_buffer rows are
+    waiting), as a single executemany plus one upsert per user-day into
+    the daily table. Daily totals are also kept in memory so quota checks
+    do not touch the database; totals written by other processes are
+    picked up when a user's cached base is older than base_ttl.
+
+    A request is counted when it is accepted, through reserve(), not only
+    when its job finishes: queued and running jobs hold a reservation
+    that record() turns into the real usage and release() gives back.
+    """
+
+    def __init__(self, events_table, daily_table, get_engine,
+                 flush_interval=5.0, max_buffer=500, base_ttl=60.0):
+        self.events_table = events_table
+        self.daily_table = daily_table
+        self.get_engine = get_engine
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.base_ttl = base_ttl
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._events = []
+        self._pending = {}  # (user_id, day) -> increments not yet flushed
+        self._in_flight = {}  # (user_id, day) -> increments being written by flush()
+        self._base = {}  # (user_id, day) -> (loaded_at, totals already in the database)
+        self._reserved = {}  # (user_id, day) -> requests accepted but not yet recorded
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background flusher; records are also flushed at interpreter exit."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="usage-flush", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def reserve(self, user_id, limit=0):
+        """
+        Counts a request against today's quota before it runs.
+
+        Args:
+            user_id (int): User making the request
+            limit (int): Requests allowed per day, or 0 for no limit
+
+        Returns:
+            datetime.date: Day the reservation was made on, to pass to
+            record() or release(); None if the limit is already reached
+        """
+        day = _today()
+        self.usage_today(user_id)  # loads or refreshes the stored totals
+        key = (user_id, day)
+        with self._lock:
+            if limit and self._totals(key)["requests"] >= limit:
+                return None
+            self._reserved[key] = self._reserved.get(key, 0) + 1
+        return day
+
+    def release(self, user_id, day):
+        """Give back a reservation whose request will not be recorded."""
+        with self._lock:
+            self._release((user_id, day))
+
+    def _release(self, key):
+        remaining = self._reserved.get(key, 0) - 1
+        if remaining > 0:
+            self._reserved[key] = remaining
+        else:
+            self._reserved.pop(key, None)
+
+    def record(self, user_id, action, tokens_in, tokens_out, latency_ms, cache_hit, reserved_on=None):
+        """Queue one summarization for the next bulk write, settling its reservation if it had one."""
+        day = _today()
+        with self._lock:
+            if reserved_on is not None:
+                self._release((user_id, reserved_on))
+            self._events.append({
+                "user_id": user_id,
+                "action": action,
+                "tokens_in": tokens_in,
+                "tokens_out": tokens_out,
+                "latency_ms": latency_ms,
+                "cache_hit": cache_hit,
+                "created": datetime.datetime.utcnow(),
+            })
+            pending = self._pending.setdefault((user_id, day), dict.fromkeys(COUNTER_FIELDS, 0))
+            pending["requests"] += 1
+            pending["tokens_in"] += tokens_in
+            pending["tokens_out"] += tokens_out
+            full = len(self._events) >= self.max_buffer
+        if full:
+            self._wake.set()
+
+    def usage_today(self, user_id):
+        """
+        Returns today's totals for a user.
+
+        Returns:
+            dict: requests, tokens_in and tokens_out, including unflushed
+            records; requests also counts reserved ones
+        """
+        key = (user_id, _today())
+        with self._lock:
+            base = self._base.get(key)
+        if base is None or time.monotonic() - base[0] > self.base_ttl:
+            # Not while a flush is between writing totals and adding them to the base
+            with self._flush_lock:
+                base = (time.monotonic(), self._load_daily(*key))
+            with self._lock:
+                self._base = {cached: value for cached, value in self._base.items() if cached[1] == key[1]}
+                self._base[key] = base
+        with self._lock:
+            return self._totals(key)
+
+    def _totals(self, key):
+        # Caller holds self._lock and has loaded the base for key
+        base = self._base.get(key, (0, dict.fromkeys(COUNTER_FIELDS, 0)))[1]
+        pending = self._pending.get(key, dict.fromkeys(COUNTER_FIELDS, 0))
+        in_flight = self._in_flight.get(key, dict.fromkeys(COUNTER_FIELDS, 0))
+        totals = {field: base[field] + pending[field] + in_flight[field] for field in COUNTER_FIELDS}
+        totals["requests"] += self._reserved.get(key, 0)
+        return totals
+
+    def _load_daily(self, user_id, day):
+        table = self.daily_table
+        with self.get_engine().connect() as connection:
+            row = connection.execute(
+                table.select().where(table.c.user_id == user_id, table.c.day == day)
+            ).mappings().first()
+        if row is None:
+            return dict.fromkeys(COUNTER_FIELDS, 0)
+        return {field: row[field] for field in COUNTER_FIELDS}
+
+    def flush(self):
+        """Write every buffered record; returns the number of events written."""
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+                pending, self._pending = self._pending, {}
+                # Still counted by _totals until the base includes them, so quota
+                # checks during the write do not see the day's usage drop
+                self._in_flight = pending
+            if not events:
+                return 0
+
+            try:
+                with metrics.span("usage_flush"):
+                    engine = self.get_engine()
+                    with engine.begin() as connection:
+                        connection.execute(insert(self.events_table), events)
+                        for (user_id, day), totals in pending.items():
+                            statement = _upsert(engine.dialect.name, self.daily_table).values(
+                                user_id=user_id, day=day, **totals
+                            )
+                            connection.execute(statement.on_conflict_do_update(
+                                index_elements=["user_id", "day"],
+                                set_={field: self.daily_table.c[field] + statement.excluded[field]
+                                      for field in COUNTER_FIELDS},
+                            ))
+            except Exception:
+                # Keep the records for the next attempt rather than losing them
+                traceback.print_exc()
+                with self._lock:
+                    self._in_flight = {}
+                    self._events = events + self._events
+                    for key, totals in pending.items():
+                        merged = self._pending.setdefault(key, dict.fromkeys(COUNTER_FIELDS, 0))
+                        for field in COUNTER_FIELDS:
+                            merged[field] += totals[field]
+                return 0
+
+            with self._lock:
+                # Flushed increments are now part of the stored totals
+                self._in_flight = {}
+                for key, totals in pending.items():
+                    if key in self._base:
+                        loaded_at, base = self._base[key]
+                        self._base[key] = (loaded_at, {field: base[field] + totals[field] for field in COUNTER_FIELDS})
+            metrics.inc("usage_events_flushed", len(events))
+            return len(events)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
@@ -0,0 +1,56 @@
+import threading
+import time
+from collections import OrderedDict
+from metrics import metrics
+
+class UserCache:
+    """
+    Small TTL + LRU cache of user column values for the Flask-Login loader.
+
+    Entries hold plain values rather than ORM instances, which would be
+    bound to the session of the request that loaded them. Invalidation
+    is per process, so with several web workers the TTL bounds how long
+    another worker may serve a stale snapshot.
+    """
+
+    def __init__(self, ttl=60.0, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """Return the cached values for user_id, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                metrics.inc("user_cache_lookups", result="hit")
+                return entry[1]
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            metrics.inc("user_cache_lookups", result="miss")
+            return None
+
+    def put(self, user_id, values):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}